@@ -0,0 +1,276 @@
+"""Scenario benchmarks for NEO DODGE.
+
+Drives the real Game through scripted, seeded scenarios under the SDL
+dummy drivers and reports per-frame update/render times and allocations,
+then compares them with bench/baselines.json.
+
+    python bench/bench.py                      # run every scenario
+    python bench/bench.py bullet_hell --frames 300
+    python bench/bench.py --check              # exit 1 on a budget, allocation or surface regression
+    python bench/bench.py --update-baselines   # store this machine's numbers
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pygame
+import main as game
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+WARMUP_FRAMES = 240
+ALLOC_FRAMES = 120
+METRICS = ("update_ms", "render_ms", "frame_ms", "alloc_kb", "surfaces")
+
+# ================= SCENARIOS =================
+class Scenario:
+    """A named, seeded workload: setup() once, then script() before every frame."""
+    name = None
+    seed = 1
+    state = game.GameState.PLAYING
+
+    def setup(self, session):
+        session.world.reset(self.seed)
+
+    def inputs(self, world):
+        return game.autopilot(world)
+
+    def script(self, session, frame):
+        # Nothing may end the run early
+        player = session.world.player
+        player.health = player.max_health
+
+class BossFight(Scenario):
+    # Level 10 spawns the boss, whose spread shots turn targeted below half hp
+    name = "boss_fight"
+    seed = 10
+
+    def setup(self, session):
+        super().setup(session)
+        world = session.world
+        world.level = game.BOSS_LEVEL_INTERVAL * 2
+        world.score = (world.level - 1) * 1000
+        world.enemies.add(game.Enemy(boss=True, level=world.level, rng=world.enemy_rng))
+
+class MaxParticles(Scenario):
+    # Chained explosions keep the particle pool close to capacity
+    name = "max_particles"
+    seed = 20
+
+    def script(self, session, frame):
+        super().script(session, frame)
+        world = session.world
+        rng = world.random.get("bench")
+        for _ in range(4):
+            pos = (rng.randint(100, game.WIDTH - 100), rng.randint(100, game.HEIGHT - 100))
+            world.add_effect(pos, "explosion", 40)
+            world.particles.burst(pos, rng.choice(game.PARTICLE_COLORS), 30,
+                                  size=(3, 6), velocity=((-8, 8), (-8, 8)), lifetime=(20, 40))
+
+class BulletHell(Scenario):
+    # A screen full of shooters that the player never fires back at
+    name = "bullet_hell"
+    seed = 30
+    shooters = 24
+
+    def inputs(self, world):
+        return game.autopilot(world) & ~game.INPUT_FIRE
+
+    def script(self, session, frame):
+        super().script(session, frame)
+        world = session.world
+        while sum(enemy.type == "shooter" for enemy in world.enemies) < self.shooters:
+            enemy = game.Enemy(level=world.level, rng=world.enemy_rng)
+            if enemy.type == "shooter":
+                enemy.rect.x -= world.random.get("bench").randint(0, game.WIDTH // 2)
+                world.enemies.add(enemy)
+
+class IdleMenu(Scenario):
+    name = "idle_menu"
+    state = game.GameState.MENU
+
+SCENARIOS = {scenario.name: scenario for scenario in (BossFight, MaxParticles, BulletHell, IdleMenu)}
+
+# ================= RUNNER =================
+class SurfaceCounter:
+    """Counts pygame.Surface constructions while installed."""
+    def __init__(self):
+        self.count = 0
+        self.original = pygame.Surface
+
+    def __enter__(self):
+        counter = self
+
+        class CountingSurface(self.original):
+            def __init__(self, *args, **kwargs):
+                counter.count += 1
+                super().__init__(*args, **kwargs)
+
+        pygame.Surface = CountingSurface
+        return self
+
+    def __exit__(self, *exc):
+        pygame.Surface = self.original
+
+def run_frames(session, scenario, frames, sample):
+    # One fixed step per frame, calling sample(update_s, render_s) after each
+    for frame in range(frames):
+        start = time.perf_counter()
+        scenario.script(session, frame)
+        session.update((0, 0), False)
+        session.tick()
+        if session.state != scenario.state:
+            # Several hits in one step can still end the mission; keep going
+            session.state = scenario.state
+            session.world.game_over = False
+        rendered = time.perf_counter()
+        session.draw((0, 0))
+        session.present()
+        sample(rendered - start, time.perf_counter() - rendered)
+
+def run_scenario(screen, scenario, frames):
+    # Every scenario starts from cold caches, whichever ran before it
+    game.sprites.clear()
+    game.text_cache.clear()
+    session = game.Game(screen, game.SaveData(None), seed=scenario.seed)
+    session.state = scenario.state
+    session.next_inputs = lambda: scenario.inputs(session.world)
+    scenario.setup(session)
+    run_frames(session, scenario, WARMUP_FRAMES, lambda *_: None)
+
+    # Allocations are measured in a separate pass, tracing slows frames down.
+    # It comes first so it covers the same frames whatever --frames is.
+    allocs = []
+    surfaces = []
+    tracemalloc.start()
+    with SurfaceCounter() as counter:
+        def sample(*_):
+            allocs.append(tracemalloc.get_traced_memory()[1] / 1024)
+            surfaces.append(counter.count)
+            counter.count = 0
+            tracemalloc.reset_peak()
+        tracemalloc.reset_peak()
+        run_frames(session, scenario, ALLOC_FRAMES, sample)
+    tracemalloc.stop()
+
+    times = []
+    run_frames(session, scenario, frames, lambda update, render: times.append((update, render)))
+    times = np.array(times) * 1000
+
+    world = session.world
+    return {
+        "update_ms": percentiles(times[:, 0]),
+        "render_ms": percentiles(times[:, 1]),
+        "frame_ms": percentiles(times.sum(axis=1)),
+        "alloc_kb": percentiles(allocs),
+        "surfaces": percentiles(surfaces),
+        "entities": {"enemies": len(world.enemies), "particles": len(world.particles),
+                     "bullets": len(world.player.bullets) + len(world.enemy_bullets)},
+        "pools": world.pool_stats(),
+    }
+
+def percentiles(values):
+    p50, p95, p99 = np.percentile(values, (50, 95, 99)).tolist()
+    return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3)}
+
+# ================= BASELINES =================
+def load_baselines():
+    if not os.path.exists(BASELINES):
+        return {"tolerance": 0.5, "scenarios": {}}
+    with open(BASELINES) as f:
+        return json.load(f)
+
+def check(name, result, baselines):
+    # (problems, warnings) for `result` against its frame budget and stored
+    # baseline. Timings recorded on another machine only warn; the budget,
+    # allocations and surface counts fail.
+    problems = []
+    warnings = []
+    baseline = baselines["scenarios"].get(name)
+    if baseline is None:
+        return [f"{name}: no baseline"], []
+    frame_p95 = result["frame_ms"]["p95"]
+    if frame_p95 > baseline["budget_ms"]:
+        problems.append(f"{name}: frame p95 {frame_p95:.2f} ms over the {baseline['budget_ms']} ms budget")
+    tolerance = baseline.get("tolerance", baselines["tolerance"])
+    for metric in METRICS:
+        limit = baseline["p95"][metric] * (1 + tolerance)
+        value = result[metric]["p95"]
+        # Small absolute slack so near-zero baselines do not flap
+        if value > limit + (0.05 if metric.endswith("_ms") else 1):
+            (warnings if metric.endswith("_ms") else problems).append(
+                f"{name}: {metric} p95 {value:.2f} > baseline {baseline['p95'][metric]:.2f} (+{tolerance:.0%})")
+    return problems, warnings
+
+def update_baselines(baselines, results):
+    for name, result in results.items():
+        entry = baselines["scenarios"].setdefault(name, {"budget_ms": round(1000 / game.FPS, 1)})
+        entry["p95"] = {metric: result[metric]["p95"] for metric in METRICS}
+    with open(BASELINES, "w") as f:
+        json.dump(baselines, f, indent=2)
+        f.write("\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--frames", type=int, default=600, help="measured frames per scenario")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if a frame budget or an allocation/surface baseline is exceeded; "
+                             "timing baselines only warn")
+    parser.add_argument("--tolerance", type=float, help="allowed p95 regression over baseline, e.g. 0.5")
+    parser.add_argument("--update-baselines", action="store_true", help="store these results as baselines")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario {', '.join(unknown)}")
+
+    pygame.init()
+    screen = pygame.display.set_mode((game.WIDTH, game.HEIGHT))
+    game.load_fonts()
+
+    baselines = load_baselines()
+    if args.tolerance is not None:
+        baselines["tolerance"] = args.tolerance
+        for entry in baselines["scenarios"].values():
+            entry.pop("tolerance", None)
+
+    results = {}
+    problems = []
+    warnings = []
+    print(f"{'scenario':<15}{'update p95':>12}{'render p95':>12}{'frame p95':>11}{'frame p99':>11}"
+          f"{'alloc KB':>10}{'surfaces':>10}")
+    for name in args.scenarios or SCENARIOS:
+        result = results[name] = run_scenario(screen, SCENARIOS[name](), args.frames)
+        print(f"{name:<15}{result['update_ms']['p95']:>12.2f}{result['render_ms']['p95']:>12.2f}"
+              f"{result['frame_ms']['p95']:>11.2f}{result['frame_ms']['p99']:>11.2f}"
+              f"{result['alloc_kb']['p95']:>10.1f}{result['surfaces']['p95']:>10.0f}")
+        if args.check:
+            failed, warned = check(name, result, baselines)
+            problems.extend(failed)
+            warnings.extend(warned)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baselines:
+        update_baselines(baselines, results)
+    for warning in warnings:
+        print("WARN", warning)
+    for problem in problems:
+        print("FAIL", problem)
+    pygame.quit()
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
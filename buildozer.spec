@@ -5,10 +5,11 @@ package.domain = org.sanjai
 
 source.dir = .
 source.include_exts = py,json,png,jpg,ogg,wav,ttf
+source.exclude_dirs = bench
 
 version = 0.1
 
-requirements = python3,pygame
+requirements = python3,pygame,numpy
 
 orientation = landscape
 fullscreen = 1
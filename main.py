@@ -1,20 +1,28 @@
+import time
+STARTED = time.perf_counter()  # The startup report counts the imports below
+
 import pygame, random, math, os, sys
+import argparse
+import csv
+import itertools
 import json
+import struct
+import threading
+import zlib
+import numpy as np
+from collections import OrderedDict, deque
 
 # ================= CONFIG =================
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
 WIDTH, HEIGHT = 900, 520
 FPS = 60
+MAX_CATCHUP_STEPS = 5
+MAX_FRAME_SKIP = 4
+MAX_FRAME_TIME = 0.25
 PLAYER_FIRE_RATE = 15
 BOSS_LEVEL_INTERVAL = 5
 BASE_SPEED = 6
 
-# ================= INIT =================
-pygame.init()
-pygame.mixer.init()
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("NEO DODGE - Cyber Arena")
-CLOCK = pygame.time.Clock()
-
 # ================= COLORS =================
 CYBER_BLUE = (0, 200, 255)
 CYBER_PINK = (255, 0, 128)
@@ -33,30 +41,259 @@ PARTICLE_COLORS = [
 ]
 
 # ================= FONTS =================
-FONT_SMALL = pygame.font.SysFont("arial", 16)
-FONT = pygame.font.SysFont("arial", 24)
-FONT_LARGE = pygame.font.SysFont("arial", 42)
-FONT_TITLE = pygame.font.SysFont("arial", 64)
+FONT_FILE = os.path.join(GAME_DIR, "font.ttf")
+FONT_SMALL = FONT = FONT_LARGE = FONT_TITLE = None
+
+def load_fonts(path=FONT_FILE):
+    # Open the TTF directly, SysFont would scan every installed font first.
+    # Without a bundled font.ttf this is pygame's own default font.
+    global FONT_SMALL, FONT, FONT_LARGE, FONT_TITLE
+    if not os.path.exists(path):
+        path = None
+    FONT_SMALL = pygame.font.Font(path, 16)
+    FONT = pygame.font.Font(path, 24)
+    FONT_LARGE = pygame.font.Font(path, 42)
+    FONT_TITLE = pygame.font.Font(path, 64)
 
 # ================= AUDIO =================
+AUDIO_RATE = 22050
+AUDIO_BUFFER = 512
+AUDIO_VOICES = 8
+
+# name: (priority, min gap in ms, max voices, volume, (wave, start Hz, end Hz, seconds))
+SOUNDS = {
+    "shoot": (1, 70, 2, 0.12, ("square", 900, 450, 0.07)),
+    "enemy_shot": (1, 90, 2, 0.1, ("square", 500, 300, 0.09)),
+    "hit": (2, 40, 3, 0.2, ("noise", 3000, 3000, 0.06)),
+    "explosion": (3, 60, 3, 0.35, ("noise", 600, 600, 0.5)),
+    "powerup": (3, 100, 1, 0.3, ("sine", 440, 1320, 0.25)),
+    "hurt": (4, 150, 1, 0.4, ("square", 220, 60, 0.3)),
+    "level_up": (5, 500, 1, 0.35, ("sine", 660, 1760, 0.5)),
+}
+MUSIC = (0.12, ("chord", 55, 55, 4.0))
+
+def synthesize(rate, wave, start_hz, end_hz, seconds):
+    # Mono samples in [-1, 1]: a pitch sweep, or low-passed noise, that fades out
+    t = np.arange(int(rate * seconds)) / rate
+    if wave == "noise":
+        # Moving average as a rough low-pass at start_hz
+        noise = np.random.default_rng(0).uniform(-1, 1, len(t))
+        window = max(1, rate // start_hz)
+        samples = np.convolve(noise, np.ones(window) / window, mode="same")
+        samples /= np.abs(samples).max()
+    elif wave == "chord":
+        # Root, fifth and octave; whole cycles in `seconds` so it loops cleanly
+        samples = sum(np.sin(2 * np.pi * start_hz * ratio * t) for ratio in (1, 1.5, 2)) / 3
+        return samples * (0.8 + 0.2 * np.sin(2 * np.pi * t / seconds))
+    else:
+        phase = 2 * np.pi * np.cumsum(np.linspace(start_hz, end_hz, len(t))) / rate
+        samples = np.sin(phase)
+        if wave == "square":
+            samples = np.sign(samples)
+    return samples * np.exp(-4 * t / seconds)
+
+def make_sound(samples, channels, volume):
+    pcm = (samples * 32767).astype(np.int16)
+    if channels > 1:
+        pcm = np.ascontiguousarray(np.repeat(pcm[:, None], channels, axis=1))
+    sound = pygame.sndarray.make_sound(pcm)
+    sound.set_volume(volume)
+    return sound
+
 class AudioManager:
+    """Synthesized sound bank played through a fixed pool of mixer channels.
+
+    Nothing touches the audio device until start(), which opens the mixer
+    and renders every sound once. play_sound() then only picks a channel:
+    a free one, else it steals the lowest-priority, oldest voice whose
+    priority does not exceed the new sound's. Repeats inside a sound's gap
+    or beyond its voice limit are dropped.
+    """
     def __init__(self):
         self.sounds = {}
+        self.music = None
         self.music_playing = False
-        
-    def play_sound(self, name, volume=0.3):
-        pass
+        self.mixer = None  # None until start(), then whether audio works
+        self.channels = []
+        self.voice_name = []
+        self.voice_priority = []
+        self.voice_start = []
+        self.last_played = {}
+        self.dropped = 0
+        self.stolen = 0
+
+    def start(self):
+        if self.mixer is not None:
+            return self.mixer
+        try:
+            pygame.mixer.init(AUDIO_RATE, -16, 2, AUDIO_BUFFER)
+        except pygame.error:
+            self.mixer = False
+            return False
+        rate, _, channels = pygame.mixer.get_init()
+        pygame.mixer.set_num_channels(AUDIO_VOICES + 1)
+        pygame.mixer.set_reserved(1)  # Channel 0 only plays music
+        self.music = (pygame.mixer.Channel(0), make_sound(synthesize(rate, *MUSIC[1]), channels, MUSIC[0]))
+        self.channels = [pygame.mixer.Channel(i + 1) for i in range(AUDIO_VOICES)]
+        self.voice_name = [None] * AUDIO_VOICES
+        self.voice_priority = [0] * AUDIO_VOICES
+        self.voice_start = [0] * AUDIO_VOICES
+        for name, (_, gap, _, volume, wave) in SOUNDS.items():
+            self.sounds[name] = make_sound(synthesize(rate, *wave), channels, volume)
+            self.last_played[name] = -gap
+        self.mixer = True
+        return True
+
+    def play_sound(self, name):
+        if not self.mixer:
+            return False
+        priority, gap, limit, _, _ = SOUNDS[name]
+        now = pygame.time.get_ticks()
+        if now - self.last_played[name] < gap:
+            self.dropped += 1
+            return False
+
+        free = victim = None
+        playing = 0
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                if free is None:
+                    free = i
+                continue
+            if self.voice_name[i] == name:
+                playing += 1
+            if self.voice_priority[i] <= priority and (
+                    victim is None
+                    or (self.voice_priority[i], self.voice_start[i])
+                    < (self.voice_priority[victim], self.voice_start[victim])):
+                victim = i
+        slot = free if free is not None else victim
+        if playing >= limit or slot is None:
+            self.dropped += 1
+            return False
+        if slot == victim:
+            self.stolen += 1
+
+        self.channels[slot].play(self.sounds[name])
+        self.voice_name[slot] = name
+        self.voice_priority[slot] = priority
+        self.voice_start[slot] = now
+        self.last_played[name] = now
+        return True
         
     def play_music(self):
-        if not self.music_playing:
+        if self.mixer and not self.music_playing:
+            channel, sound = self.music
+            channel.play(sound, loops=-1)
             self.music_playing = True
 
+    def stop_music(self):
+        if self.music_playing:
+            self.music[0].fadeout(500)
+            self.music_playing = False
+
 audio = AudioManager()
 
 # ================= SAVE SYSTEM =================
 SAVE_FILE = "game_save.json"
+SAVE_COALESCE = 0.25
+SAVE_RETRY = 5.0
+
+class SaveWriter:
+    """Writes save data on a background thread.
+
+    submit() only stores the latest snapshot, so a burst of saves (e.g.
+    several upgrades bought in a row) becomes one write once the burst has
+    been quiet for SAVE_COALESCE seconds. Each write goes to a temp file
+    that is fsynced and renamed over the save; the previous save is kept
+    as a .bak for load() to fall back on. A write that fails is reported
+    once and retried every SAVE_RETRY seconds with the newest snapshot.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.backup = path and path + ".bak"
+        self.pending = None
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+        self.closing = False
+        self.writes = 0
+        self.error = None
+
+    def submit(self, data):
+        if self.path is None:
+            return
+        with self.lock:
+            self.pending = data
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="save-writer", daemon=True)
+                self.thread.start()
+        self.wake.set()
+
+    def run(self):
+        while not self.closing:
+            self.wake.wait(SAVE_RETRY if self.error else None)
+            # Let a burst settle so only its last snapshot is written
+            while self.wake.is_set() and not self.closing:
+                self.wake.clear()
+                time.sleep(SAVE_COALESCE)
+            self.write_pending()
+
+    def write_pending(self):
+        with self.lock:
+            data, self.pending = self.pending, None
+        if data is None:
+            return
+        try:
+            self.write(data)
+        except OSError as e:
+            # Keep the snapshot for the next attempt unless a newer one came in
+            with self.lock:
+                if self.pending is None:
+                    self.pending = data
+            if self.error is None:
+                print(f"Could not write {self.path}: {e}", file=sys.stderr)
+            self.error = e
+        else:
+            self.error = None
+
+    def write(self, data):
+        temp = self.path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(self.path):
+            os.replace(self.path, self.backup)
+        os.replace(temp, self.path)
+        self.sync_directory()
+        self.writes += 1
+
+    def sync_directory(self):
+        # Make the renames durable; not every platform can fsync a directory
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def close(self):
+        # Stop the worker and write anything still pending on this thread
+        self.closing = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.closing = False
+        self.write_pending()
+
 class SaveData:
-    def __init__(self):
+    # path=None keeps progress in memory only, as replay playback does
+    def __init__(self, path=SAVE_FILE):
         self.high_score = 0
         self.total_kills = 0
         self.total_playtime = 0
@@ -69,98 +306,699 @@ class SaveData:
             "shield": 0
         }
         self.coins = 0
-        
+        self.writer = SaveWriter(path)
+
     def load(self):
-        try:
-            with open(SAVE_FILE, "r") as f:
-                data = json.load(f)
-                self.high_score = data.get("high_score", 0)
-                self.total_kills = data.get("total_kills", 0)
-                self.total_playtime = data.get("total_playtime", 0)
-                self.unlocked_ships = data.get("unlocked_ships", ["default"])
-                self.upgrades = data.get("upgrades", {"damage": 0, "speed": 0, "fire_rate": 0, "health": 0, "shield": 0})
-                self.coins = data.get("coins", 0)
-        except:
+        # Fall back to the backup if the save is missing or unreadable
+        paths = (self.writer.path, self.writer.backup) if self.writer.path else ()
+        for path in paths:
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if isinstance(data, dict):
+                break
+        else:
             self.save()
-            
+            return
+        self.high_score = data.get("high_score", 0)
+        self.total_kills = data.get("total_kills", 0)
+        self.total_playtime = data.get("total_playtime", 0)
+        self.unlocked_ships = data.get("unlocked_ships", ["default"])
+        self.upgrades = data.get("upgrades", {"damage": 0, "speed": 0, "fire_rate": 0, "health": 0, "shield": 0})
+        self.coins = data.get("coins", 0)
+
     def save(self):
+        # Snapshot now; the file is written off the game thread
         data = {
             "high_score": self.high_score,
             "total_kills": self.total_kills,
             "total_playtime": self.total_playtime,
-            "unlocked_ships": self.unlocked_ships,
-            "upgrades": self.upgrades,
+            "unlocked_ships": list(self.unlocked_ships),
+            "upgrades": dict(self.upgrades),
             "coins": self.coins
         }
-        with open(SAVE_FILE, "w") as f:
-            json.dump(data, f, indent=2)
+        self.writer.submit(data)
+
+    def close(self):
+        self.writer.close()
 
 save_data = SaveData()
-save_data.load()
 
 # ================= TEXT HELPER FUNCTION =================
 def draw_text(surface, text, font, color, x, y):
-    text_surface = font.render(text, True, color)
-    surface.blit(text_surface, (x, y))
+    text_cache.draw(surface, text, font, color, (x, y))
+
+def interpolate_rect(rect, prev_pos, alpha):
+    # Copy of `rect` placed `alpha` of the way from prev_pos to rect
+    if alpha >= 1:
+        return rect
+    return rect.move(round((prev_pos[0] - rect.x) * (1 - alpha)),
+                     round((prev_pos[1] - rect.y) * (1 - alpha)))
+
+# ================= PROFILER =================
+PROFILE_WINDOW = 240
+PROFILE_REFRESH = 15
+
+class Profiler:
+    """Per-section frame timings behind a single enabled check.
+
+    Sections are recorded as laps: lap(name) charges the time since the
+    previous lap (or since frame()) to `name`, summed over the frame, so
+    fixed steps that run several times a frame add up. While disabled every
+    call returns immediately. Rolling p50/p95/p99 cover the last
+    PROFILE_WINDOW frames; with record=True every frame is kept for dump().
+    """
+    def __init__(self):
+        self.enabled = False
+        self.visible = False
+        self.record = False
+        self.current = None
+        self.last = 0.0
+        self.counts = {}
+        self.window = []
+        self.trace = []
+        self.frames = 0
+        self.overlay = None
+        self.overlay_age = 0
+
+    def enable(self, visible=True, record=False):
+        self.enabled = True
+        self.visible = visible
+        self.record = self.record or record
+
+    def toggle(self):
+        if self.visible:
+            self.visible = False
+            self.enabled = self.record
+        else:
+            self.enable()
+        self.current = None
+        self.overlay = None
+
+    def frame(self):
+        # Close the previous frame and start timing a new one
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.current is not None:
+            row = self.current
+            row["frame"] = sum(t for name, t in row.items() if name != "idle")
+            row.update(self.counts)
+            self.window.append(row)
+            if len(self.window) > PROFILE_WINDOW:
+                del self.window[0]
+            if self.record:
+                self.trace.append(dict(row, index=self.frames))
+            self.frames += 1
+        self.current = {}
+        self.last = now
+
+    def lap(self, name):
+        if not self.enabled or self.current is None:
+            return
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + (now - self.last)
+        self.last = now
+
+    def sample(self, world, quality=None):
+        if not self.enabled:
+            return
+        self.counts = {"particle_count": len(world.particles),
+                       "bullet_count": len(world.player.bullets) + len(world.enemy_bullets),
+                       "enemy_count": len(world.enemies)}
+        if quality is not None:
+            self.counts["quality_tier"] = quality.index
+
+    @staticmethod
+    def percentiles(rows):
+        # {section: (p50, p95, p99)} in milliseconds, missing laps count as 0
+        names = []
+        for row in rows:
+            names.extend(name for name in row if name not in names)
+        stats = {}
+        for name in names:
+            if name == "index" or name.endswith(("_count", "_tier")):
+                continue
+            values = np.array([row.get(name, 0.0) for row in rows]) * 1000
+            stats[name] = tuple(np.percentile(values, (50, 95, 99)).tolist())
+        return stats
+
+    def draw(self, surface):
+        if not self.visible or not self.window:
+            return
+        self.overlay_age -= 1
+        if self.overlay is None or self.overlay_age <= 0:
+            self.overlay = self.build_overlay()
+            self.overlay_age = PROFILE_REFRESH
+        surface.blit(self.overlay, (surface.get_width() - self.overlay.get_width() - 10, 90))
+        self.lap("profiler")
+
+    def build_overlay(self):
+        # Section name plus right-aligned p50/p95/p99 columns, counts at the bottom
+        rows = [("ms", "p50", "p95", "p99")]
+        for name, values in self.percentiles(self.window).items():
+            rows.append((name, *(f"{v:.2f}" for v in values)))
+        counts = "  ".join(f"{name.rsplit('_', 1)[0]} {count}" for name, count in self.counts.items())
+        line_height = FONT_SMALL.get_linesize()
+        name_width, column = 110, 50
+        overlay = pygame.Surface((name_width + column * 3 + 16, line_height * (len(rows) + 1) + 12),
+                                 pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            y = 6 + i * line_height
+            color = CYBER_BLUE if i == 0 else NEON_WHITE
+            overlay.blit(FONT_SMALL.render(row[0], True, color), (8, y))
+            for j, value in enumerate(row[1:]):
+                text = FONT_SMALL.render(value, True, color)
+                overlay.blit(text, (8 + name_width + column * (j + 1) - text.get_width(), y))
+        overlay.blit(FONT_SMALL.render(counts, True, CYBER_YELLOW),
+                     (8, 6 + len(rows) * line_height))
+        return overlay
+
+    def dump(self, path):
+        # Write the recorded trace as CSV, or as JSON with a summary if path ends in .json
+        rows = self.trace
+        if path.endswith(".json"):
+            summary = {name: dict(zip(("p50", "p95", "p99"), values))
+                       for name, values in self.percentiles(rows).items()} if rows else {}
+            with open(path, "w") as f:
+                json.dump({"unit": "seconds", "summary_ms": summary, "frames": rows}, f)
+            return
+        names = ["index"]
+        for row in rows:
+            names.extend(name for name in row if name not in names)
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=names, restval=0)
+            writer.writeheader()
+            writer.writerows(rows)
+
+profiler = Profiler()
+
+class StartupTimer:
+    """Wall-clock breakdown of a launch, one entry per stage()."""
+    def __init__(self, start):
+        self.last = start
+        self.stages = []
+        self.done = False
+        self.verbose = False
+
+    def stage(self, name):
+        # Charge the time since the previous stage to `name`
+        now = time.perf_counter()
+        self.stages.append((name, now - self.last))
+        self.last = now
+
+    def finish(self, name):
+        self.stage(name)
+        self.done = True
+        if self.verbose:
+            self.report()
+
+    def report(self):
+        for name, seconds in self.stages:
+            print(f"{name:<12}{seconds * 1000:8.1f} ms")
+        print(f"{'total':<12}{sum(seconds for _, seconds in self.stages) * 1000:8.1f} ms")
+
+startup = StartupTimer(STARTED)
+
+# ================= SPRITE CACHE =================
+SPRITE_CACHE_BYTES = 16 * 1024 * 1024
+ALPHA_STEP = 16
+SPARK_STEPS = 16
+BOSS_RING_PHASES = 16
+
+def alpha_bucket(alpha):
+    # Quantize alpha so nearby values share one cached surface
+    return max(0, min(255, int(round(alpha / ALPHA_STEP)) * ALPHA_STEP))
+
+class SpriteCache:
+    """LRU cache of pre-rendered surfaces, bounded by pixel memory.
+
+    Keys are tuples such as ("glow", size, color, alpha); `build` is only
+    called on a miss and must return a new surface.
+    """
+    def __init__(self, max_bytes=SPRITE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = build()
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert_alpha() if surf.get_flags() & pygame.SRCALPHA else surf.convert()
+        self.surfaces[key] = surf
+        self.bytes += self.surface_bytes(surf)
+
+        # Evict least recently used, always keeping the new entry
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, old = self.surfaces.popitem(last=False)
+            self.bytes -= self.surface_bytes(old)
+        return surf
+
+    @staticmethod
+    def surface_bytes(surf):
+        return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+    def circle(self, size, radius, color, alpha=255, width=0):
+        # Circle centered on a size x size transparent surface
+        alpha = alpha_bucket(alpha)
+        key = ("circle", size, radius, color, alpha, width)
+
+        def build():
+            surf = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(surf, (*color, alpha), (size // 2, size // 2), radius, width)
+            return surf
+
+        return self.get(key, build)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes = 0
+
+sprites = SpriteCache()
+
+# ================= RENDER TARGETS =================
+class RenderTargets:
+    """Reusable offscreen surfaces for full-screen passes.
+
+    Targets are pooled by (size, flags, tag) and converted to the display
+    format on creation, so shake buffers and overlays are allocated once
+    instead of every frame. Callers own the contents and must clear them.
+    """
+    def __init__(self):
+        self.targets = {}
+
+    def acquire(self, size, flags=0, tag=None):
+        key = (tuple(size), flags, tag)
+        surf = self.targets.get(key)
+        if surf is None:
+            surf = pygame.Surface(size, flags)
+            if pygame.display.get_surface() is not None:
+                surf = surf.convert_alpha() if flags & pygame.SRCALPHA else surf.convert()
+            self.targets[key] = surf
+        return surf
+
+    def overlay(self, size, color):
+        # Translucent full-size fill, filled only when first created
+        key = (tuple(size), pygame.SRCALPHA, ("overlay", color))
+        if key not in self.targets:
+            self.acquire(size, pygame.SRCALPHA, key[2]).fill(color)
+        return self.targets[key]
+
+    def composite(self, surface, target, offset=(0, 0)):
+        # Final blit of an offscreen pass, e.g. a shaken frame
+        surface.blit(target, (int(offset[0]), int(offset[1])))
+
+    def clear(self):
+        self.targets.clear()
+
+# ================= QUALITY =================
+class Quality:
+    HIGH = 0
+    MEDIUM = 1
+    LOW = 2
+
+class QualityTier:
+    """One rung of the visual detail ladder walked by QualityGovernor."""
+    __slots__ = ("name", "particles", "scale", "particle_share", "nebula_layers", "boss_rings", "grid")
+
+    def __init__(self, name, particles, scale, particle_share, nebula_layers, boss_rings, grid):
+        self.name = name
+        self.particles = particles
+        self.scale = scale
+        self.particle_share = particle_share
+        self.nebula_layers = nebula_layers
+        self.boss_rings = boss_rings
+        self.grid = grid
+
+# Particle quality, world scale, share of particles drawn, nebula layers,
+# boss rings and background grid, from full detail down
+QUALITY_TIERS = (
+    QualityTier("high", Quality.HIGH, 1.0, 1.0, 3, 3, True),
+    QualityTier("medium", Quality.MEDIUM, 1.0, 0.75, 2, 2, True),
+    QualityTier("low", Quality.MEDIUM, 0.75, 0.5, 2, 1, True),
+    QualityTier("minimal", Quality.LOW, 0.5, 0.25, 1, 1, False),
+)
+
+# ================= VIEWPORT =================
+class Viewport:
+    """Maps the logical WIDTH x HEIGHT world onto a render target.
+
+    The world is laid out at scale 1. Below that, every world draw goes
+    through here: positions and lengths are scaled, and sprites come back
+    as smoothscaled copies cached beside their originals. `tier` is the
+    QualityTier the current frame is drawn at.
+    """
+    def __init__(self):
+        self.scale = 1.0
+        self.tier = QUALITY_TIERS[0]
+
+    def size(self, size):
+        return (max(1, round(size[0] * self.scale)), max(1, round(size[1] * self.scale)))
+
+    def pos(self, x, y):
+        return (int(x * self.scale), int(y * self.scale))
+
+    def length(self, value):
+        return max(1, int(value * self.scale))
+
+    def rect(self, rect):
+        x, y, w, h = rect
+        return pygame.Rect(*self.pos(x, y), self.length(w), self.length(h))
+
+    def scaled(self, key, surf):
+        if self.scale == 1:
+            return surf
+        return sprites.get(("scaled", self.scale, key),
+                           lambda: pygame.transform.smoothscale(surf, self.size(surf.get_size())))
+
+    def sprite(self, key, build):
+        return self.scaled(key, sprites.get(key, build))
+
+view = Viewport()
+
+# ================= TEXT CACHE =================
+TEXT_CACHE_BYTES = 4 * 1024 * 1024
+DIGITS = "0123456789"
+
+class TextCache:
+    """Rendered strings plus per-(font, color) digit atlases.
+
+    render() memoizes whole strings in an LRU SpriteCache. draw() splits
+    the text into digit and non-digit runs: labels come from the string
+    cache and digits are blitted from an atlas, so counters such as the
+    score never rasterize text once their font and color have been seen.
+    """
+    def __init__(self, max_bytes=TEXT_CACHE_BYTES):
+        self.strings = SpriteCache(max_bytes)
+        self.atlases = {}
+
+    def render(self, font, text, color):
+        return self.strings.get(("text", font, text, color),
+                                lambda: font.render(text, True, color))
+
+    def atlas(self, font, color):
+        # {digit: (glyph, advance)}; each digit is rendered whole and placed
+        # by the font's own advance, as font.render() spaces them
+        atlas = self.atlases.get((font, color))
+        if atlas is None:
+            atlas = self.atlases[(font, color)] = {}
+            for digit, metrics in zip(DIGITS, font.metrics(DIGITS)):
+                glyph = font.render(digit, True, color)
+                if pygame.display.get_surface() is not None:
+                    glyph = glyph.convert_alpha()
+                atlas[digit] = (glyph, metrics[4])
+        return atlas
+
+    def draw(self, surface, text, font, color, pos, flags=0):
+        # Blit `text` at pos and return its width
+        x, y = pos
+        glyphs = self.atlas(font, color)
+        blits = []
+        for is_digit, chars in itertools.groupby(text, DIGITS.__contains__):
+            if is_digit:
+                for digit in chars:
+                    glyph, advance = glyphs[digit]
+                    blits.append((glyph, (x, y), None, flags))
+                    x += advance
+            else:
+                run = self.render(font, "".join(chars), color)
+                blits.append((run, (x, y), None, flags))
+                x += run.get_width()
+        surface.blits(blits, doreturn=False)
+        return x - pos[0]
+
+    def size(self, text, font, color):
+        # Extent of what draw() paints, glyphs overhanging their advance included
+        glyphs = self.atlas(font, color)
+        x = right = 0
+        height = font.get_height()
+        for is_digit, chars in itertools.groupby(text, DIGITS.__contains__):
+            if is_digit:
+                for digit in chars:
+                    glyph, advance = glyphs[digit]
+                    right = max(right, x + glyph.get_width())
+                    height = max(height, glyph.get_height())
+                    x += advance
+            else:
+                run = self.render(font, "".join(chars), color)
+                x += run.get_width()
+                height = max(height, run.get_height())
+        return max(x, right), height
+
+    def clear(self):
+        self.strings.clear()
+        self.atlases.clear()
+
+text_cache = TextCache()
 
 # ================= VISUAL EFFECTS =================
-class Particle:
-    def __init__(self, pos, color=None, size=2, velocity=None, lifetime=30, trail=False):
-        self.pos = list(pos)
-        self.size = size
-        self.lifetime = lifetime
-        self.max_lifetime = lifetime
-        self.trail = trail
-        self.color = color or random.choice(PARTICLE_COLORS)
-        self.velocity = velocity or [random.uniform(-3, 3), random.uniform(-3, 3)]
-        self.gravity = 0.1 if not trail else 0
-        
+PARTICLE_CAPACITY = 4096
+PARTICLE_DRAG = 0.98
+PARTICLE_GRAVITY = 0.1
+PARTICLE_SHARE_STEPS = 8
+
+def spawn_range(rng, value, count, integer=False):
+    # Scalars are used as-is, (low, high) tuples are sampled uniformly
+    if isinstance(value, tuple):
+        low, high = value
+        if integer:
+            return rng.integers(low, high + 1, count)
+        return rng.uniform(low, high, count)
+    return np.full(count, value)
+
+class ParticleSystem:
+    """Structure-of-arrays particle engine with a hard capacity.
+
+    Live particles occupy the first `count` slots of every column. Dead
+    particles are compacted out in place after each update, keeping the
+    spawn order that drawing relies on. Spawns beyond capacity are dropped.
+    Every particle keeps the spawn serial it was given, which lets the
+    renderer thin out the same particles frame after frame.
+    """
+    def __init__(self, capacity=PARTICLE_CAPACITY):
+        self.capacity = capacity
+        self.count = 0
+        self.high_water = 0
+        self.dropped = 0
+        self.spawned = 0
+        self.rng = np.random.default_rng()
+        self.pos = np.zeros((capacity, 2), np.float32)
+        self.vel = np.zeros((capacity, 2), np.float32)
+        self.life = np.zeros(capacity, np.int32)
+        self.max_life = np.zeros(capacity, np.int32)
+        self.gravity = np.zeros(capacity, np.float32)
+        self.size = np.zeros(capacity, np.int32)
+        self.color = np.zeros((capacity, 3), np.uint8)
+        self.trail = np.zeros(capacity, np.bool_)
+        self.serial = np.zeros(capacity, np.uint32)
+        self.columns = (self.pos, self.vel, self.life, self.max_life,
+                        self.gravity, self.size, self.color, self.trail, self.serial)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def reserve(self, count):
+        # Slice of free slots for up to `count` new particles
+        start = self.count
+        stop = min(self.capacity, start + count)
+        self.count = stop
+        self.high_water = max(self.high_water, stop)
+        self.dropped += start + count - stop
+        self.serial[start:stop] = np.arange(self.spawned, self.spawned + stop - start)
+        self.spawned += stop - start
+        return start, stop
+
+    def spawn(self, pos, color=None, size=2, velocity=None, lifetime=30, trail=False):
+        start, stop = self.reserve(1)
+        if start == stop:
+            return 0
+        self.pos[start] = pos
+        self.vel[start] = velocity or self.rng.uniform(-3, 3, 2).tolist()
+        self.life[start] = lifetime
+        self.max_life[start] = lifetime
+        self.gravity[start] = 0 if trail else PARTICLE_GRAVITY
+        self.size[start] = size
+        self.color[start] = color or PARTICLE_COLORS[self.rng.integers(len(PARTICLE_COLORS))]
+        self.trail[start] = trail
+        return 1
+
+    def burst(self, pos, color, count, size=2, velocity=((-3, 3), (-3, 3)), lifetime=30):
+        # Spawn `count` particles at once; size, lifetime and each velocity
+        # axis may be a scalar or a (low, high) range
+        start, stop = self.reserve(count)
+        n = stop - start
+        if n == 0:
+            return 0
+        rng = self.rng
+        self.pos[start:stop] = pos
+        self.vel[start:stop, 0] = spawn_range(rng, velocity[0], n)
+        self.vel[start:stop, 1] = spawn_range(rng, velocity[1], n)
+        life = spawn_range(rng, lifetime, n, integer=True)
+        self.life[start:stop] = life
+        self.max_life[start:stop] = life
+        self.gravity[start:stop] = PARTICLE_GRAVITY
+        self.size[start:stop] = spawn_range(rng, size, n, integer=True)
+        self.color[start:stop] = color
+        self.trail[start:stop] = False
+        return n
+
     def update(self):
-        self.pos[0] += self.velocity[0]
-        self.pos[1] += self.velocity[1]
-        self.velocity[1] += self.gravity
-        self.lifetime -= 1
-        
+        n = self.count
+        if n == 0:
+            return
+        pos, vel = self.pos[:n], self.vel[:n]
+        pos += vel
+        vel[:, 1] += self.gravity[:n]
+        self.life[:n] -= 1
+
         # Air resistance
-        self.velocity[0] *= 0.98
-        self.velocity[1] *= 0.98
-        
-        return self.lifetime > 0
-        
-    def draw(self, surface):
-        alpha = int(255 * (self.lifetime / self.max_lifetime))
-        
-        if self.trail:
-            # Draw trail line
-            end_pos = (self.pos[0] - self.velocity[0]*2, 
-                      self.pos[1] - self.velocity[1]*2)
-            
-            # Create surface for line with alpha
-            line_surf = pygame.Surface((abs(self.pos[0]-end_pos[0])+self.size*2, 
-                                       abs(self.pos[1]-end_pos[1])+self.size*2), 
-                                      pygame.SRCALPHA)
-            color_with_alpha = (*self.color, alpha)
-            pygame.draw.line(line_surf, color_with_alpha, 
-                           (self.size, self.size), 
-                           (end_pos[0]-self.pos[0]+self.size, 
-                            end_pos[1]-self.pos[1]+self.size), 
-                           self.size)
-            surface.blit(line_surf, (self.pos[0]-self.size, self.pos[1]-self.size))
+        vel *= PARTICLE_DRAG
+
+        alive = self.life[:n] > 0
+        live = int(np.count_nonzero(alive))
+        if live < n:
+            for column in self.columns:
+                column[:live] = column[:n][alive]
+            self.count = live
+
+def build_spark(size, color, step, glow=True):
+    # Dot at `step` of SPARK_STEPS remaining lifetime, optionally haloed
+    ratio = step / SPARK_STEPS
+    alpha = int(255 * ratio)
+    radius = size * ratio
+    glow_surf = pygame.Surface((size*4, size*4), pygame.SRCALPHA)
+    if glow:
+        pygame.draw.circle(glow_surf, (*color, alpha//2), (size*2, size*2), radius*2)
+    pygame.draw.circle(glow_surf, (*color, alpha), (size*2, size*2), radius)
+    return glow_surf
+
+def build_trail(dx, dy, size, color, step):
+    # Fading line from the particle back along its velocity
+    alpha = int(255 * step / SPARK_STEPS)
+    line_surf = pygame.Surface((abs(dx)+size*2, abs(dy)+size*2), pygame.SRCALPHA)
+    start = (size + max(0, -dx), size + max(0, -dy))
+    pygame.draw.line(line_surf, (*color, alpha), start, (start[0]+dx, start[1]+dy), size)
+    return line_surf
+
+class ParticleRenderer:
+    """Draws every live particle of a ParticleSystem in one batched pass.
+
+    HIGH and MEDIUM blit alpha-stepped sprites (with and without the glow
+    halo) through a single Surface.blits() call. LOW writes point sparks
+    straight into the target's pixel buffer with surfarray. With a `share`
+    below 1 only that fraction of particles, picked by spawn serial, is drawn.
+    """
+    def __init__(self, quality=Quality.HIGH, share=1.0):
+        self.quality = quality
+        self.share = share
+
+    def draw(self, surface, system, alpha=1.0):
+        n = system.count
+        if n == 0:
+            return
+        steps = np.ceil(SPARK_STEPS * system.life[:n] / system.max_life[:n])
+        steps = np.maximum(steps, 1).astype(np.int64)
+        trail = system.trail[:n]
+        shown = np.ones(n, np.bool_)
+        if self.share < 1:
+            shown = system.serial[:n] % PARTICLE_SHARE_STEPS < round(self.share * PARTICLE_SHARE_STEPS)
+
+        # Step back along the velocity to the interpolated render position
+        pos = system.pos[:n] - system.vel[:n] * (1 - alpha)
+        if view.scale != 1:
+            pos *= view.scale
+
+        if self.quality == Quality.LOW and surface.get_bytesize() >= 3:
+            self.draw_points(surface, system, pos, steps, shown & ~trail)
+            blits = []
         else:
-            # Draw particle circle with glow
-            glow_surf = pygame.Surface((self.size*4, self.size*4), pygame.SRCALPHA)
-            radius = self.size * (self.lifetime / self.max_lifetime)
-            pygame.draw.circle(glow_surf, (*self.color, alpha//2), 
-                             (self.size*2, self.size*2), radius*2)
-            pygame.draw.circle(glow_surf, (*self.color, alpha), 
-                             (self.size*2, self.size*2), radius)
-            surface.blit(glow_surf, (self.pos[0]-self.size*2, self.pos[1]-self.size*2))
-
-particles = []
-effects = []
+            blits = self.spark_blits(system, pos, steps, shown & ~trail, self.quality == Quality.HIGH)
+        if trail.any():
+            blits.extend(self.trail_blits(system, pos, steps, np.flatnonzero(shown & trail)))
+        surface.blits(blits, doreturn=False)
+
+    def spark_blits(self, system, pos, steps, mask, glow):
+        index = np.flatnonzero(mask)
+        if index.size == 0:
+            return []
+        size = system.size[index].astype(np.int64)
+        color = system.color[index].astype(np.int64)
+        rgb = (color[:, 0] << 16) | (color[:, 1] << 8) | color[:, 2]
+
+        # One sprite per distinct (color, size, step); particles map onto them
+        codes = (rgb << 16) | (size << 8) | steps[index]
+        unique, inverse = np.unique(codes, return_inverse=True)
+        kind = "spark" if glow else "spark_core"
+        surfs = []
+        for code in unique.tolist():
+            spark_color = ((code >> 32) & 255, (code >> 24) & 255, (code >> 16) & 255)
+            spark_size = (code >> 8) & 255
+            step = code & 255
+            surfs.append(view.sprite((kind, spark_size, spark_color, step),
+                                     lambda: build_spark(spark_size, spark_color, step, glow)))
+
+        dest = pos[index] - (size * 2 * view.scale)[:, None]
+        return list(zip([surfs[i] for i in inverse.tolist()], dest.tolist()))
+
+    def trail_blits(self, system, pos, steps, index):
+        blits = []
+        for i in index.tolist():
+            x, y = pos[i].tolist()
+            vx, vy = system.vel[i].tolist()
+            dx, dy = -round(vx*2), -round(vy*2)
+            size = int(system.size[i])
+            color = tuple(system.color[i].tolist())
+            step = int(steps[i])
+            line_surf = view.sprite(("trail", dx, dy, size, color, step),
+                                    lambda: build_trail(dx, dy, size, color, step))
+            blits.append((line_surf, (x - (size + max(0, -dx)) * view.scale,
+                                      y - (size + max(0, -dy)) * view.scale)))
+        return blits
+
+    def draw_points(self, surface, system, pos, steps, mask):
+        n = system.count
+        width, height = surface.get_size()
+        xs = pos[:, 0].astype(np.int64)
+        ys = pos[:, 1].astype(np.int64)
+        mask = mask & (xs >= 0) & (xs < width - 1) & (ys >= 0) & (ys < height - 1)
+        if not mask.any():
+            return
+        xs, ys = xs[mask], ys[mask]
+        alpha = (steps[mask] / SPARK_STEPS)[:, None]
+        color = system.color[:n][mask] * alpha
+
+        # 2x2 sparks alpha-blended over whatever is already on the surface
+        pixels = pygame.surfarray.pixels3d(surface)
+        try:
+            for ox, oy in ((0, 0), (1, 0), (0, 1), (1, 1)):
+                dst = pixels[xs + ox, ys + oy]
+                pixels[xs + ox, ys + oy] = (dst * (1 - alpha) + color).astype(np.uint8)
+        finally:
+            del pixels
 
 class VisualEffect:
+    __slots__ = ("id", "pos", "type", "duration", "time", "size")
+
     def __init__(self, pos, effect_type, duration=30):
+        self.id = 0
+        self.reset(pos, effect_type, duration)
+
+    def reset(self, pos, effect_type, duration=30):
         self.pos = pos
         self.type = effect_type
         self.duration = duration
@@ -182,6 +1020,7 @@ class VisualEffect:
         return True
         
     def draw(self, surface):
+        center = view.pos(*self.pos)
         if self.type == "explosion":
             # Shockwave rings
             for i in range(3):
@@ -189,9 +1028,7 @@ class VisualEffect:
                 alpha = 150 - i * 50 - (self.time * 2)
                 if alpha > 0:
                     color = (*CYBER_YELLOW, alpha)
-                    pygame.draw.circle(surface, color, 
-                                     (int(self.pos[0]), int(self.pos[1])), 
-                                     int(radius), 2)
+                    pygame.draw.circle(surface, color, center, view.length(radius), view.length(2))
                     
         elif self.type == "powerup":
             # Rotating hexagon
@@ -201,50 +1038,130 @@ class VisualEffect:
                 rad = angle + i * math.pi / 3
                 x = self.pos[0] + math.cos(rad) * self.size
                 y = self.pos[1] + math.sin(rad) * self.size
-                points.append((x, y))
+                points.append(view.pos(x, y))
             
             # Draw with gradient
             for i in range(len(points)):
                 pygame.draw.line(surface, CYBER_GREEN, 
-                               points[i], points[(i+1)%len(points)], 3)
+                               points[i], points[(i+1)%len(points)], view.length(3))
                 
         elif self.type == "hit":
             # X mark
             size = self.size
+            x, y = self.pos
             pygame.draw.line(surface, (*CYBER_RED, 200), 
-                           (self.pos[0]-size, self.pos[1]-size),
-                           (self.pos[0]+size, self.pos[1]+size), 4)
+                           view.pos(x-size, y-size), view.pos(x+size, y+size), view.length(4))
             pygame.draw.line(surface, (*CYBER_RED, 200),
-                           (self.pos[0]+size, self.pos[1]-size),
-                           (self.pos[0]-size, self.pos[1]+size), 4)
-
-def add_effect(pos, effect_type, duration=30):
-    effects.append(VisualEffect(pos, effect_type, duration))
+                           view.pos(x+size, y-size), view.pos(x-size, y+size), view.length(4))
 
 # ================= BACKGROUND =================
-class Star:
-    def __init__(self):
-        self.x = random.randint(0, WIDTH)
-        self.y = random.randint(0, HEIGHT)
-        self.speed = random.uniform(0.5, 2.0)
-        self.size = random.randint(1, 3)
-        self.brightness = random.randint(150, 255)
-        self.pulse = random.random() * math.pi * 2
-        
+# (count, speed, size, brightness): far layers are many, slow, small and dim
+STAR_LAYERS = (
+    (1500, 0.3, 1, 0.45),
+    (800, 0.6, 1, 0.7),
+    (250, 1.2, 2, 1.0),
+    (60, 2.0, 3, 1.0),
+)
+STAR_LEVELS = 16
+STAR_PULSE = 0.05
+
+def build_star(size, level):
+    value = level * 255 // (STAR_LEVELS - 1)
+    star_surf = pygame.Surface((size*2 + 1, size*2 + 1), pygame.SRCALPHA)
+    pygame.draw.circle(star_surf, (value, value, value), (size, size), size)
+    return star_surf
+
+class Starfield:
+    """Parallax star layers kept as columns and advanced in one numpy step.
+
+    Brightness pulses are quantized to STAR_LEVELS values. One-pixel stars
+    are written straight into the surface's pixels; larger ones are
+    blitted from cached sprites with a single blits() call.
+    """
+    def __init__(self, layers=STAR_LAYERS, rng=None):
+        self.rng = rng or np.random.default_rng()
+        # Point stars first, so both kinds are contiguous slices
+        layers = sorted(layers, key=lambda layer: layer[2])
+        counts = [layer[0] for layer in layers]
+        n = sum(counts)
+        self.x = self.rng.uniform(0, WIDTH, n).astype(np.float32)
+        self.y = self.rng.uniform(0, HEIGHT, n).astype(np.float32)
+        # Stars within a layer drift at slightly different speeds
+        self.speed = (np.repeat([layer[1] for layer in layers], counts)
+                      * self.rng.uniform(0.8, 1.2, n)).astype(np.float32)
+        self.size = np.repeat([layer[2] for layer in layers], counts).astype(np.int32)
+        self.dim = np.repeat([layer[3] for layer in layers], counts).astype(np.float32)
+        self.pulse = self.rng.uniform(0, math.pi * 2, n).astype(np.float32)
+        self.points = int(np.count_nonzero(self.size == 1))
+
+        # Per-frame scratch, reused so a frame allocates almost nothing
+        self.value = np.zeros(n, np.float32)
+        self.level = np.zeros(n, np.int32)
+        self.grey = np.zeros(n, np.uint8)
+        self.xs = np.zeros(n, np.intp)
+        self.ys = np.zeros(n, np.intp)
+        self.wrapped = np.zeros(n, np.bool_)
+
+    def __len__(self):
+        return len(self.x)
+
     def update(self, speed_factor=1.0):
-        self.x -= self.speed * speed_factor
-        if self.x < 0:
-            self.x = WIDTH
-            self.y = random.randint(0, HEIGHT)
-            
-        self.pulse += 0.05
-        self.brightness = 150 + int(100 * math.sin(self.pulse))
-        
+        np.multiply(self.speed, speed_factor, out=self.value)
+        self.x -= self.value
+        wrapped = np.less(self.x, 0, out=self.wrapped)
+        count = int(np.count_nonzero(wrapped))
+        if count:
+            # Re-enter on the right at a new height
+            self.x[wrapped] += WIDTH
+            self.y[wrapped] = self.rng.uniform(0, HEIGHT, count)
+        self.pulse += STAR_PULSE
+
     def draw(self, surface):
-        color = (self.brightness, self.brightness, self.brightness)
-        pygame.draw.circle(surface, color, (int(self.x), int(self.y)), self.size)
+        # Positions are kept in WIDTH x HEIGHT space and scaled to the surface
+        width, height = surface.get_size()
+        np.multiply(self.x, width / WIDTH, out=self.value)
+        np.copyto(self.xs, self.value, casting="unsafe")
+        np.multiply(self.y, height / HEIGHT, out=self.value)
+        np.copyto(self.ys, self.value, casting="unsafe")
+        # float32 rounding can land a wrapped star exactly on the far edge
+        np.clip(self.xs, 0, width - 1, out=self.xs)
+        np.clip(self.ys, 0, height - 1, out=self.ys)
+
+        value = np.sin(self.pulse, out=self.value)
+        value *= 100
+        value += 150
+        value *= self.dim
+        value *= (STAR_LEVELS - 1) / 255
+        np.copyto(self.level, np.rint(value, out=value), casting="unsafe")
+
+        start = self.points
+        if surface.get_bytesize() < 3:
+            start = 0
+        elif start:
+            grey = self.grey[:start]
+            np.multiply(self.level[:start], 255 // (STAR_LEVELS - 1), out=grey, casting="unsafe")
+            pixels = pygame.surfarray.pixels3d(surface)
+            try:
+                pixels[self.xs[:start], self.ys[:start]] = grey[:, None]
+            finally:
+                del pixels
+
+        if start == len(self.x):
+            return
+        # Look each (size, level) sprite up once, then fan it out by index
+        size = self.size[start:]
+        if width != WIDTH:
+            size = np.maximum(1, (size * width) // WIDTH)
+        key = size * STAR_LEVELS + self.level[start:]
+        keys, inverse = np.unique(key, return_inverse=True)
+        table = [sprites.get(("star", *divmod(k, STAR_LEVELS)), lambda k=k: build_star(*divmod(k, STAR_LEVELS)))
+                 for k in keys.tolist()]
+        dest = zip((self.xs[start:] - size).tolist(), (self.ys[start:] - size).tolist())
+        surface.blits(zip(map(table.__getitem__, inverse.tolist()), dest), doreturn=False)
 
 class Nebula:
+    __slots__ = ("x", "y", "size", "color", "alpha", "speed")
+
     def __init__(self):
         self.x = random.randint(0, WIDTH)
         self.y = random.randint(0, HEIGHT)
@@ -260,72 +1177,254 @@ class Nebula:
             self.y = random.randint(0, HEIGHT)
             
     def draw(self, surface):
+        layers = view.tier.nebula_layers
+        nebula_surf = view.sprite(("nebula", self.size, self.color, self.alpha, layers),
+                                  lambda: self.build(layers))
+        surface.blit(nebula_surf, view.pos(self.x - self.size, self.y - self.size))
+
+    def build(self, layers=3):
         nebula_surf = pygame.Surface((self.size*2, self.size*2), pygame.SRCALPHA)
-        for i in range(3):
+        for i in range(layers):
             radius = self.size - i * 30
             alpha = self.alpha - i * 10
             if alpha > 0 and radius > 0:
                 pygame.draw.circle(nebula_surf, (*self.color, alpha), 
                                  (self.size, self.size), radius)
-        surface.blit(nebula_surf, (int(self.x - self.size), int(self.y - self.size)))
-
-stars = [Star() for _ in range(100)]
-nebulas = [Nebula() for _ in range(3)]
-
-def draw_background(surface, speed_factor=1.0):
-    # Deep space gradient
-    for y in range(HEIGHT):
-        color_value = 10 + y // 40
-        color = (color_value, color_value + 5, color_value + 10)
-        pygame.draw.line(surface, color, (0, y), (WIDTH, y))
-    
-    # Update and draw nebulas
-    for nebula in nebulas:
-        nebula.update(speed_factor * 0.5)
-        nebula.draw(surface)
-    
-    # Update and draw stars with parallax
-    for star in stars:
-        star.update(speed_factor)
-        star.draw(surface)
-    
-    # Grid lines in background
-    for x in range(0, WIDTH, 50):
-        pygame.draw.line(surface, (100, 100, 200, 30), 
-                        (x, 0), (x, HEIGHT), 1)
-    for y in range(0, HEIGHT, 50):
-        pygame.draw.line(surface, (100, 100, 200, 30), 
-                        (0, y), (WIDTH, y), 1)
-    
-    # Scan line effect
-    scan_y = (pygame.time.get_ticks() // 20) % HEIGHT
-    pygame.draw.line(surface, (0, 255, 255, 50), (0, scan_y), (WIDTH, scan_y), 2)
+        return nebula_surf
+
+class BackgroundCompositor:
+    """Bakes the static gradient and grid once per resolution.
+
+    Only the moving layers (nebulas, stars, scan line) are redrawn each
+    frame; the gradient and grid are single blits of cached surfaces.
+    The nebulas and stars move in update(), once per fixed step, so the
+    background scrolls at game speed whatever the frame rate.
+    """
+    GRID_SPACING = 50
+    GRID_COLOR = (100, 100, 200)
+    GRID_KEY = (0, 0, 0)
+
+    def __init__(self):
+        self.size = None
+        self.gradient = None
+        self.grid = None
+        self.starfield = Starfield()
+        self.nebulas = [Nebula() for _ in range(3)]
+
+    def rebuild(self, size):
+        width, height = size
+        self.size = size
+
+        # Deep space gradient, banded in logical rows at any resolution
+        self.gradient = pygame.Surface(size)
+        for y in range(height):
+            color_value = 10 + int(y * HEIGHT / height) // 40
+            color = (color_value, color_value + 5, color_value + 10)
+            pygame.draw.line(self.gradient, color, (0, y), (width, y))
+
+        # Grid lines, drawn over the stars so kept on a colorkeyed layer
+        self.grid = pygame.Surface(size)
+        self.grid.fill(self.GRID_KEY)
+        self.grid.set_colorkey(self.GRID_KEY)
+        spacing = self.GRID_SPACING * width / WIDTH
+        for i in range(math.ceil(width / spacing)):
+            x = round(i * spacing)
+            pygame.draw.line(self.grid, self.GRID_COLOR, (x, 0), (x, height), 1)
+        for i in range(math.ceil(height / spacing)):
+            y = round(i * spacing)
+            pygame.draw.line(self.grid, self.GRID_COLOR, (0, y), (width, y), 1)
+
+        if pygame.display.get_surface() is not None:
+            self.gradient = self.gradient.convert()
+            self.grid = self.grid.convert()
+
+    def update(self, speed_factor=1.0):
+        for nebula in self.nebulas:
+            nebula.update(speed_factor * 0.5)
+        self.starfield.update(speed_factor)
+
+    def draw(self, surface):
+        width, height = surface.get_size()
+        if self.size != (width, height):
+            self.rebuild((width, height))
+
+        surface.blit(self.gradient, (0, 0))
+
+        for nebula in self.nebulas:
+            nebula.draw(surface)
+
+        # Stars with parallax
+        self.starfield.draw(surface)
+
+        if view.tier.grid:
+            surface.blit(self.grid, (0, 0))
+
+        # Scan line effect
+        scan_y = (pygame.time.get_ticks() // 20) % HEIGHT * height // HEIGHT
+        pygame.draw.line(surface, (0, 255, 255, 50), (0, scan_y), (width, scan_y), max(1, 2 * height // HEIGHT))
+
+# ================= WORLD BOUNDS =================
+# Anything wholly outside its bounds is culled. Enemies and power-ups get a
+# margin to enter and leave through; bullets go as soon as they are off screen.
+CULL_MARGIN = 50
+SCREEN_BOUNDS = pygame.Rect(0, 0, WIDTH, HEIGHT)
+WORLD_BOUNDS = SCREEN_BOUNDS.inflate(CULL_MARGIN * 2, CULL_MARGIN * 2)
+BULLET_LIFETIME = 6 * FPS
+POWERUP_LIFETIME = 15 * FPS
+
+def in_bounds(rect, bounds=WORLD_BOUNDS):
+    # False once `rect` lies wholly outside `bounds`
+    return not (rect.right < bounds.left or rect.left > bounds.right or
+                rect.bottom < bounds.top or rect.top > bounds.bottom)
+
+# ================= BULLETS =================
+BULLET_CAPACITY = 1024
+BULLET_COLORS = [CYBER_BLUE, CYBER_GREEN, CYBER_PURPLE, CYBER_PINK]
+OWNER_PLAYER = 0
+OWNER_WORLD = -1  # Enemy bullets still in flight after their enemy is gone
+
+def round_rect_coord(values):
+    # pygame.Rect rounds float coordinates half away from zero
+    return np.copysign(np.floor(np.abs(values) + 0.5), values)
+
+class BulletPool:
+    """Fixed-capacity bullet storage in NumPy columns.
+
+    Live bullets occupy the first `count` rows. Positions stay on whole
+    pixels like the pygame.Rect they replace. Removals compact the
+    survivors in place, keeping them in firing order. Every bullet
+    carries the frames it has left to live.
+    """
+    def __init__(self, capacity=BULLET_CAPACITY):
+        self.capacity = capacity
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.w = np.zeros(capacity, np.int32)
+        self.h = np.zeros(capacity, np.int32)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.damage = np.zeros(capacity)
+        self.color = np.zeros(capacity, np.int8)
+        self.owner = np.zeros(capacity, np.int64)
+        self.life = np.zeros(capacity, np.int32)
+        self.columns = (self.x, self.y, self.w, self.h, self.vx, self.vy,
+                        self.damage, self.color, self.owner, self.life)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def add(self, x, y, w, h, vx, vy, damage=1, color=0, owner=OWNER_PLAYER, lifetime=BULLET_LIFETIME):
+        # Returns the new bullet's index, or -1 when the pool is full
+        i = self.count
+        if i == self.capacity:
+            return -1
+        self.x[i] = round_rect_coord(x)
+        self.y[i] = round_rect_coord(y)
+        self.w[i] = w
+        self.h[i] = h
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.damage[i] = damage
+        self.color[i] = color
+        self.owner[i] = owner
+        self.life[i] = lifetime
+        self.count = i + 1
+        return i
+
+    def step(self):
+        n = self.count
+        self.x[:n] = round_rect_coord(self.x[:n] + self.vx[:n])
+        self.y[:n] = round_rect_coord(self.y[:n] + self.vy[:n])
+        self.life[:n] -= 1
+
+    def cull(self, bounds=SCREEN_BOUNDS):
+        # Drop bullets wholly outside `bounds` or past their lifetime
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        self.remove_mask((x + self.w[:n] < bounds.left) | (x > bounds.right) |
+                         (y + self.h[:n] < bounds.top) | (y > bounds.bottom) |
+                         (self.life[:n] <= 0))
+
+    def remove_mask(self, mask):
+        # Remove every bullet where `mask` is set, keeping the others in order
+        n = self.count
+        if not mask.any():
+            return
+        keep = ~mask
+        live = int(np.count_nonzero(keep))
+        for column in self.columns:
+            column[:live] = column[:n][keep]
+        self.count = live
+
+    def remove_indices(self, indices):
+        mask = np.zeros(self.count, np.bool_)
+        mask[list(indices)] = True
+        self.remove_mask(mask)
+
+    def transfer_owners(self, owners, owner=OWNER_WORLD):
+        n = self.count
+        self.owner[:n][np.isin(self.owner[:n], list(owners))] = owner
+
+    def rect(self, i):
+        return pygame.Rect(self.x[i], self.y[i], self.w[i], self.h[i])
+
+    def center(self, i):
+        return self.rect(i).center
+
+    def draw(self, surface, alpha=1.0):
+        n = self.count
+        if n == 0:
+            return
+        # Bullets fly straight, so the previous position is one velocity back
+        xs = self.x[:n] - self.vx[:n] * (1 - alpha)
+        ys = self.y[:n] - self.vy[:n] * (1 - alpha)
+        blits = []
+        for x, y, w, h, color in zip(xs.tolist(), ys.tolist(),
+                                     self.w[:n].tolist(), self.h[:n].tolist(),
+                                     self.color[:n].tolist()):
+            bullet_surf = view.sprite(("bullet", w, h, color),
+                                      lambda: build_bullet(w, h, BULLET_COLORS[color]))
+            blits.append((bullet_surf, view.pos(x, y)))
+        surface.blits(blits, doreturn=False)
+
+def build_bullet(w, h, color):
+    bullet_surf = pygame.Surface((w, h), pygame.SRCALPHA)
+    pygame.draw.rect(bullet_surf, color, (0, 0, w, h), 0, 3)
+    return bullet_surf
 
 # ================= PLAYER =================
 class Player:
-    def __init__(self):
+    def __init__(self, save):
+        self.upgrades = save.upgrades
         self.rect = pygame.Rect(80, HEIGHT//2, 42, 42)
-        self.speed = BASE_SPEED + save_data.upgrades["speed"] * 0.5
-        self.health = 3 + save_data.upgrades["health"]
-        self.max_health = 3 + save_data.upgrades["health"]
+        self.speed = BASE_SPEED + save.upgrades["speed"] * 0.5
+        self.health = 3 + save.upgrades["health"]
+        self.max_health = 3 + save.upgrades["health"]
         self.inv = 0
-        self.bullets = []
+        self.bullets = BulletPool()
         self.fire = 0
-        self.fire_rate = PLAYER_FIRE_RATE - save_data.upgrades["fire_rate"] * 2
-        self.trail = []
+        self.fire_rate = PLAYER_FIRE_RATE - save.upgrades["fire_rate"] * 2
+        self.trail = deque(maxlen=20)
         self.angle = 0
-        self.damage = 1 + save_data.upgrades["damage"] * 0.5
+        self.damage = 1 + save.upgrades["damage"] * 0.5
         self.shield = False
         self.shield_time = 0
         self.ship_type = "default"
-        self.coins = save_data.coins
-        
-    def update(self, keys):
+        self.coins = save.coins
+        self.prev_pos = self.rect.topleft
+
+    def update(self, inputs, world):
+        self.prev_pos = self.rect.topleft
+
         # Movement with smoother acceleration
         move_y = 0
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
+        if inputs & INPUT_UP:
             move_y -= self.speed
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        if inputs & INPUT_DOWN:
             move_y += self.speed
             
         # Convert to integer for rect position
@@ -339,25 +1438,23 @@ class Player:
         
         # Shooting
         self.fire += 1
-        if self.fire > self.fire_rate and (keys[pygame.K_SPACE] or keys[pygame.K_z]):
-            self.shoot()
+        if self.fire > self.fire_rate and inputs & INPUT_FIRE:
+            self.shoot(world)
             self.fire = 0
             
         # Update trail
         self.trail.append((self.rect.centerx, self.rect.centery))
-        if len(self.trail) > 20:
-            self.trail.pop(0)
             
         # Add trail particles
         if len(self.trail) > 1:
-            particles.append(Particle(
+            world.particles.spawn(
                 self.rect.center,
                 CYBER_BLUE,
                 size=2,
-                velocity=[random.uniform(-0.5, 0.5), random.uniform(-0.5, 0.5)],
+                velocity=world.particles.rng.uniform(-0.5, 0.5, 2).tolist(),
                 lifetime=20,
                 trail=False
-            ))
+            )
             
         # Update shield
         if self.shield_time > 0:
@@ -370,95 +1467,232 @@ class Player:
         if self.inv > 0:
             self.inv -= 1
             
-    def shoot(self):
+    def shoot(self, world):
         bullet_x = self.rect.right
         bullet_y = self.rect.centery - 2
-        
+
         # Different bullet patterns based on upgrades
-        bullet_count = 1 + min(2, save_data.upgrades["damage"] // 2)
+        bullet_count = 1 + min(2, self.upgrades["damage"] // 2)
         
         for i in range(bullet_count):
             offset = (i - (bullet_count - 1) / 2) * 8
-            self.bullets.append({
-                "rect": pygame.Rect(bullet_x, bullet_y + offset, 16, 6),
-                "damage": self.damage,
-                "type": "player",
-                "color": CYBER_BLUE
-            })
+            self.bullets.add(bullet_x, bullet_y + offset, 16, 6, 12, 0,
+                             damage=self.damage, color=BULLET_COLORS.index(CYBER_BLUE))
             
+        audio.play_sound("shoot")
+
         # Muzzle flash
-        for _ in range(10):
-            particles.append(Particle(
-                (self.rect.right, self.rect.centery),
-                CYBER_YELLOW,
-                size=random.randint(2, 4),
-                velocity=[random.uniform(3, 6), random.uniform(-2, 2)],
-                lifetime=15
-            ))
-        
-    def draw(self, surface):
+        world.particles.burst(
+            (self.rect.right, self.rect.centery),
+            CYBER_YELLOW,
+            10,
+            size=(2, 4),
+            velocity=((3, 6), (-2, 2)),
+            lifetime=15
+        )
+        
+    def draw(self, surface, alpha=1.0):
+        rect = interpolate_rect(self.rect, self.prev_pos, alpha)
+
         # Draw trail
         for i, pos in enumerate(self.trail):
-            alpha = 100 - i * 5
-            if alpha > 0:
-                trail_surf = pygame.Surface((10, 10), pygame.SRCALPHA)
-                pygame.draw.circle(trail_surf, (*CYBER_BLUE, alpha), 
-                                 (5, 5), 5 - i//4)
-                surface.blit(trail_surf, (pos[0]-5, pos[1]-5))
-        
-        # Draw player ship with rotation
-        ship_surf = pygame.Surface((self.rect.width + 10, self.rect.height + 10), 
-                                 pygame.SRCALPHA)
-        
-        # Ship body
-        points = [
-            (10, self.rect.height//2),  # Left point
-            (self.rect.width + 5, 5),   # Top right
-            (self.rect.width + 5, self.rect.height - 5)  # Bottom right
-        ]
-        
-        # Draw with gradient
-        for i in range(3):
-            color = (CYBER_BLUE[0], CYBER_BLUE[1], CYBER_BLUE[2], 200 - i*50)
-            scaled_points = [(x+i*2, y) for x, y in points]
-            pygame.draw.polygon(ship_surf, color, scaled_points)
-        
-        # Rotate ship
-        rotated_ship = pygame.transform.rotate(ship_surf, self.angle * 10)
-        ship_rect = rotated_ship.get_rect(center=self.rect.center)
+            trail_alpha = 100 - i * 5
+            if trail_alpha > 0:
+                trail_surf = sprites.circle(view.length(10), view.length(5 - i//4), CYBER_BLUE, trail_alpha)
+                surface.blit(trail_surf, view.pos(pos[0]-5, pos[1]-5))
+        
+        # Draw player ship with rotation (cached per whole degree)
+        degrees = round(self.angle * 10)
+        rotated_ship = view.sprite(("ship", self.rect.size, degrees),
+                                   lambda: pygame.transform.rotate(self.build_ship(), degrees))
+        ship_rect = rotated_ship.get_rect(center=view.pos(*rect.center))
         surface.blit(rotated_ship, ship_rect)
         
         # Shield
         if self.shield:
             shield_alpha = 100 + int(100 * math.sin(pygame.time.get_ticks() * 0.01))
             pygame.draw.circle(surface, (*CYBER_GREEN, shield_alpha), 
-                             self.rect.center, 25, 3)
+                             view.pos(*rect.center), view.length(25), view.length(3))
             
         # Health display on player
         for i in range(self.max_health):
             color = CYBER_GREEN if i < self.health else (50, 50, 50)
             pygame.draw.rect(surface, color, 
-                           (self.rect.x + i * 10, self.rect.y - 15, 8, 4))
+                           view.rect((rect.x + i * 10, rect.y - 15, 8, 4)))
             
         # Invincibility flash
         if self.inv > 0 and self.inv % 4 < 2:
-            flash_surf = pygame.Surface((self.rect.width + 10, self.rect.height + 10), pygame.SRCALPHA)
-            pygame.draw.rect(flash_surf, (*NEON_WHITE, 100), 
-                           (0, 0, self.rect.width + 10, self.rect.height + 10), 2, 5)
-            surface.blit(flash_surf, (self.rect.x-5, self.rect.y-5))
-
-player = Player()
+            flash_surf = view.sprite(("ship_flash", self.rect.size), self.build_flash)
+            surface.blit(flash_surf, view.pos(rect.x-5, rect.y-5))
 
-# ================= ENEMIES =================
-class Enemy:
-    def __init__(self, boss=False, level=1):
-        self.boss = boss
-        self.level = level
-        self.bullets = []  # FIXED: Initialize bullets for ALL enemies
+    def build_ship(self):
+        ship_surf = pygame.Surface((self.rect.width + 10, self.rect.height + 10), 
+                                 pygame.SRCALPHA)
+        
+        # Ship body
+        points = [
+            (10, self.rect.height//2),  # Left point
+            (self.rect.width + 5, 5),   # Top right
+            (self.rect.width + 5, self.rect.height - 5)  # Bottom right
+        ]
+        
+        # Draw with gradient
+        for i in range(3):
+            color = (CYBER_BLUE[0], CYBER_BLUE[1], CYBER_BLUE[2], 200 - i*50)
+            scaled_points = [(x+i*2, y) for x, y in points]
+            pygame.draw.polygon(ship_surf, color, scaled_points)
+        return ship_surf
+
+    def build_flash(self):
+        flash_surf = pygame.Surface((self.rect.width + 10, self.rect.height + 10), pygame.SRCALPHA)
+        pygame.draw.rect(flash_surf, (*NEON_WHITE, 100), 
+                       (0, 0, self.rect.width + 10, self.rect.height + 10), 2, 5)
+        return flash_surf
+
+# ================= ENEMIES =================
+ENEMY_FILE = os.path.join(GAME_DIR, "enemies.json")
+SHOOTER_BULLET_COLOR = BULLET_COLORS.index(CYBER_GREEN)
+
+enemy_ids = itertools.count(OWNER_PLAYER + 1)
+
+def draw_rounded_square(surf, size, color):
+    pygame.draw.rect(surf, color, (0, 0, size, size), 0, 8)
+
+def draw_triangle(surf, size, color):
+    pygame.draw.polygon(surf, color, [(size//2, 0), (size, size), (0, size)])
+
+def draw_circle(surf, size, color):
+    pygame.draw.circle(surf, color, (size//2, size//2), size//2)
+
+def draw_bar(surf, size, color):
+    pygame.draw.rect(surf, color, (0, size//3, size, size//3), 0, 5)
+
+def draw_wedge(surf, size, color):
+    pygame.draw.polygon(surf, color, [(0, 0), (size, size//2), (0, size)])
+
+ENEMY_SHAPES = {
+    "rounded_square": draw_rounded_square,
+    "triangle": draw_triangle,
+    "circle": draw_circle,
+    "bar": draw_bar,
+    "wedge": draw_wedge,
+}
+
+def spawn_zigzag(enemy, rng):
+    enemy.zig_dir = rng.choice([-1, 1])
+
+def update_zigzag(enemy, player_pos, bullets):
+    enemy.zig_timer += 1
+    if enemy.zig_timer > 20:
+        enemy.zig_dir *= -1
+        enemy.zig_timer = 0
+    enemy.rect.y += enemy.zig_dir * 2
+    enemy.rect.y = max(0, min(HEIGHT - enemy.size, enemy.rect.y))
+
+def update_shoot(enemy, player_pos, bullets):
+    enemy.shoot_timer += 1
+    if enemy.shoot_timer > 60:
+        dx = player_pos[0] - enemy.rect.centerx
+        dy = player_pos[1] - enemy.rect.centery
+        dist = max(1, math.sqrt(dx*dx + dy*dy))
+        bullets.add(enemy.rect.left - 10, enemy.rect.centery - 3, 12, 6,
+                    -dx/dist * 5, -dy/dist * 5,
+                    color=SHOOTER_BULLET_COLOR, owner=enemy.id)
+        audio.play_sound("enemy_shot")
+        enemy.shoot_timer = 0
+
+# Behavior name -> (spawn hook or None, per-step update)
+ENEMY_BEHAVIORS = {
+    "zigzag": (spawn_zigzag, update_zigzag),
+    "shoot": (None, update_shoot),
+}
+
+class Archetype:
+    """One regular enemy type: its stats, behavior hooks and pre-rendered body."""
+    __slots__ = ("name", "weight", "size", "hp", "speed", "color", "spawners", "updaters", "sprite")
+
+    def __init__(self, name, weight, size, hp, speed, color, shape, behaviors=()):
+        unknown = [b for b in behaviors if b not in ENEMY_BEHAVIORS]
+        if shape not in ENEMY_SHAPES or unknown:
+            raise ValueError(f"enemy {name!r}: unknown shape {shape!r} or behaviors {unknown}")
+        self.name = name
+        self.weight = weight
+        self.size = size
+        self.hp = hp
+        self.speed = speed
+        self.color = tuple(color)
+        hooks = [ENEMY_BEHAVIORS[b] for b in behaviors]
+        self.spawners = tuple(spawn for spawn, _ in hooks if spawn)
+        self.updaters = tuple(update for _, update in hooks)
+        self.sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+        ENEMY_SHAPES[shape](self.sprite, size, self.color)
+
+class ArchetypeRegistry:
+    """Regular enemy types by name, and the weighted pick that spawns them.
+
+    A registry made with a `path` reads it the first time an archetype is
+    needed, so importing the game touches no files.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.archetypes = {}
+        self.choices = []
+        self.cum_weights = []
+
+    def register(self, archetype):
+        self.archetypes[archetype.name] = archetype
+        self.choices = list(self.archetypes.values())
+        self.cum_weights = list(itertools.accumulate(a.weight for a in self.choices))
+
+    def load(self, path):
+        with open(path) as f:
+            for name, spec in json.load(f)["enemies"].items():
+                self.register(Archetype(name, **spec))
+        return self
+
+    def require(self):
+        if self.path is not None:
+            self.load(self.path)
+            self.path = None
+        return self
+
+    def convert(self):
+        # Match the bodies to the display format once there is a display
+        self.require()
+        if pygame.display.get_surface() is not None:
+            for archetype in self.choices:
+                archetype.sprite = archetype.sprite.convert_alpha()
+
+    def pick(self, rng):
+        self.require()
+        return rng.choices(self.choices, cum_weights=self.cum_weights)[0]
+
+    def __getitem__(self, name):
+        return self.require().archetypes[name]
+
+archetypes = ArchetypeRegistry(ENEMY_FILE)
+
+class Enemy:
+    __slots__ = ("id", "boss", "level", "type", "archetype", "size", "rect", "prev_pos", "hp", "max_hp",
+                 "speed", "color", "shoot_timer", "zig_dir", "zig_timer",
+                 "attack_pattern", "attack_timer")
+
+    def __init__(self, boss=False, level=1, rng=random):
+        self.id = 0  # Owner tag for this enemy's bullets, set by EntityStore.add()
+        self.boss = boss
+        self.level = level
+        self.type = "boss" if boss else None
+        self.archetype = None
+        # Every kind carries every timer, so all enemies share one layout
+        self.shoot_timer = 0
+        self.zig_dir = 1
+        self.zig_timer = 0
+        self.attack_pattern = 0
+        self.attack_timer = 0
         
         if boss:
             self.size = 80 + level * 5
-            self.rect = pygame.Rect(WIDTH + 40, random.randint(0, HEIGHT - self.size), 
+            self.rect = pygame.Rect(WIDTH + 40, rng.randint(0, HEIGHT - self.size), 
                                   self.size, self.size)
             self.hp = 20 + level * 5
             self.max_hp = 20 + level * 5
@@ -467,79 +1701,30 @@ class Enemy:
             self.attack_pattern = 0
             self.attack_timer = 0
         else:
-            enemy_types = ["normal", "fast", "tank", "shooter", "zigzag"]
-            weights = [0.3, 0.2, 0.2, 0.15, 0.15]
-            self.type = random.choices(enemy_types, weights=weights)[0]
-            
-            if self.type == "normal":
-                self.size = 35
-                self.hp = 2
-                self.speed = 4
-                self.color = CYBER_RED
-            elif self.type == "fast":
-                self.size = 25
-                self.hp = 1
-                self.speed = 7
-                self.color = CYBER_PINK
-            elif self.type == "tank":
-                self.size = 50
-                self.hp = 5
-                self.speed = 2.5
-                self.color = (255, 100, 0)
-            elif self.type == "shooter":
-                self.size = 40
-                self.hp = 3
-                self.speed = 3
-                self.color = CYBER_GREEN
-                self.shoot_timer = 0
-            elif self.type == "zigzag":
-                self.size = 30
-                self.hp = 2
-                self.speed = 4
-                self.color = CYBER_YELLOW
-                self.zig_dir = random.choice([-1, 1])
-                self.zig_timer = 0
-                
-            self.rect = pygame.Rect(WIDTH + 40, random.randint(0, HEIGHT - self.size), 
+            archetype = self.archetype = archetypes.pick(rng)
+            self.type = archetype.name
+            self.size = archetype.size
+            self.hp = archetype.hp
+            self.speed = archetype.speed
+            self.color = archetype.color
+            for spawn in archetype.spawners:
+                spawn(self, rng)
+
+            self.rect = pygame.Rect(WIDTH + 40, rng.randint(0, HEIGHT - self.size), 
                                   self.size, self.size)
             self.max_hp = self.hp
+        self.prev_pos = self.rect.topleft
             
-    def update(self, player_pos):
+    def update(self, player_pos, bullets):
+        self.prev_pos = self.rect.topleft
         if self.boss:
-            self.update_boss(player_pos)
+            self.update_boss(player_pos, bullets)
         else:
             self.rect.x -= int(self.speed)
-            
-            if self.type == "zigzag":
-                self.zig_timer += 1
-                if self.zig_timer > 20:
-                    self.zig_dir *= -1
-                    self.zig_timer = 0
-                self.rect.y += self.zig_dir * 2
-                self.rect.y = max(0, min(HEIGHT - self.size, self.rect.y))
-                
-            elif self.type == "shooter":
-                self.shoot_timer += 1
-                if self.shoot_timer > 60:
-                    dx = player_pos[0] - self.rect.centerx
-                    dy = player_pos[1] - self.rect.centery
-                    dist = max(1, math.sqrt(dx*dx + dy*dy))
-                    self.bullets.append({
-                        "rect": pygame.Rect(self.rect.left - 10, self.rect.centery - 3, 12, 6),
-                        "vel": [-dx/dist * 5, -dy/dist * 5],
-                        "color": CYBER_GREEN
-                    })
-                    self.shoot_timer = 0
-        
-        # Update enemy bullets for ALL enemies
-        for bullet in self.bullets[:]:
-            bullet["rect"].x += bullet["vel"][0]
-            bullet["rect"].y += bullet["vel"][1]
-            
-            if bullet["rect"].right < 0 or bullet["rect"].left > WIDTH:
-                self.bullets.remove(bullet)
-                
-    def update_boss(self, player_pos):
+            for behave in self.archetype.updaters:
+                behave(self, player_pos, bullets)
+
+    def update_boss(self, player_pos, bullets):
         self.attack_timer += 1
         
         # Movement pattern
@@ -552,11 +1737,10 @@ class Enemy:
                 # Spread shot
                 for angle in range(-30, 31, 15):
                     rad = math.radians(angle)
-                    self.bullets.append({
-                        "rect": pygame.Rect(self.rect.left - 10, self.rect.centery - 4, 16, 8),
-                        "vel": [-math.cos(rad) * 4, -math.sin(rad) * 4],
-                        "color": CYBER_PURPLE
-                    })
+                    bullets.add(self.rect.left - 10, self.rect.centery - 4, 16, 8,
+                                -math.cos(rad) * 4, -math.sin(rad) * 4,
+                                color=BULLET_COLORS.index(CYBER_PURPLE), owner=self.id)
+                audio.play_sound("enemy_shot")
                     
             if self.hp < self.max_hp // 2:
                 self.attack_pattern = 1
@@ -568,99 +1752,94 @@ class Enemy:
                 dx = player_pos[0] - self.rect.centerx
                 dy = player_pos[1] - self.rect.centery
                 dist = max(1, math.sqrt(dx*dx + dy*dy))
-                self.bullets.append({
-                    "rect": pygame.Rect(self.rect.left - 10, self.rect.centery - 4, 16, 8),
-                    "vel": [-dx/dist * 6, -dy/dist * 6],
-                    "color": CYBER_PINK
-                })
+                bullets.add(self.rect.left - 10, self.rect.centery - 4, 16, 8,
+                            -dx/dist * 6, -dy/dist * 6,
+                            color=BULLET_COLORS.index(CYBER_PINK), owner=self.id)
+                audio.play_sound("enemy_shot")
                 
-    def draw(self, surface):
+    def draw(self, surface, alpha=1.0):
+        rect = interpolate_rect(self.rect, self.prev_pos, alpha)
+
         if self.boss:
-            # Boss with special effects
-            boss_surf = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
-            
-            # Boss core
-            pygame.draw.circle(boss_surf, self.color, 
-                             (self.size//2, self.size//2), self.size//3)
-            
-            # Rotating rings
+            # Boss with special effects; the rings repeat every 1/8 turn
             ring_time = pygame.time.get_ticks() * 0.001
-            for i in range(3):
-                radius = self.size//2 - i * 5
-                points = []
-                for j in range(8):
-                    angle = ring_time + j * math.pi / 4
-                    x = self.size//2 + math.cos(angle) * radius
-                    y = self.size//2 + math.sin(angle) * radius
-                    points.append((x, y))
-                
-                for j in range(len(points)):
-                    pygame.draw.line(boss_surf, CYBER_PINK, 
-                                   points[j], points[(j+1)%len(points)], 2)
-                    
-            surface.blit(boss_surf, self.rect)
+            phase = int(ring_time % (math.pi / 4) / (math.pi / 4) * BOSS_RING_PHASES)
+            rings = view.tier.boss_rings
+            boss_surf = view.sprite(("boss", self.size, self.color, phase, rings),
+                                    lambda: self.build_boss(phase, rings))
+            surface.blit(boss_surf, view.pos(*rect.topleft))
             
             # Health bar
             bar_width = 120
             bar_height = 10
-            bar_x = self.rect.centerx - bar_width//2
-            bar_y = self.rect.y - 25
+            bar_x = rect.centerx - bar_width//2
+            bar_y = rect.y - 25
             
             # Background
-            pygame.draw.rect(surface, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height), 0, 5)
+            bar = view.rect((bar_x, bar_y, bar_width, bar_height))
+            pygame.draw.rect(surface, (50, 50, 50), bar, 0, 5)
             
             # Health
             health_width = (self.hp / self.max_hp) * bar_width
             health_color = CYBER_GREEN if self.hp > self.max_hp//2 else CYBER_YELLOW
-            pygame.draw.rect(surface, health_color, (bar_x, bar_y, health_width, bar_height), 0, 5)
+            pygame.draw.rect(surface, health_color, view.rect((bar_x, bar_y, health_width, bar_height)), 0, 5)
             
             # Border
-            pygame.draw.rect(surface, NEON_WHITE, (bar_x, bar_y, bar_width, bar_height), 2, 5)
+            pygame.draw.rect(surface, NEON_WHITE, bar, view.length(2), 5)
             
             # Boss name
-            name_text = FONT.render("SYSTEM OVERLORD", True, CYBER_PURPLE)
-            surface.blit(name_text, (self.rect.centerx - name_text.get_width()//2, bar_y - 30))
+            name_text = text_cache.render(FONT, "SYSTEM OVERLORD", CYBER_PURPLE)
+            name_x = rect.centerx - name_text.get_width()//2
+            surface.blit(view.scaled(("boss_name",), name_text), view.pos(name_x, bar_y - 30))
             
         else:
             # Regular enemy
-            enemy_surf = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
-            
-            # Different shapes for different types
-            if self.type == "normal":
-                pygame.draw.rect(enemy_surf, self.color, (0, 0, self.size, self.size), 0, 8)
-            elif self.type == "fast":
-                points = [(self.size//2, 0), (self.size, self.size), (0, self.size)]
-                pygame.draw.polygon(enemy_surf, self.color, points)
-            elif self.type == "tank":
-                pygame.draw.circle(enemy_surf, self.color, (self.size//2, self.size//2), self.size//2)
-            elif self.type == "shooter":
-                pygame.draw.rect(enemy_surf, self.color, (0, self.size//3, self.size, self.size//3), 0, 5)
-            elif self.type == "zigzag":
-                pygame.draw.polygon(enemy_surf, self.color, 
-                                  [(0, 0), (self.size, self.size//2), (0, self.size)])
+            surface.blit(view.scaled(("enemy", self.type), self.archetype.sprite), view.pos(*rect.topleft))
                 
             # Health indicator
             health_ratio = self.hp / self.max_hp
             if health_ratio < 1:
-                pygame.draw.rect(enemy_surf, CYBER_RED, 
-                               (0, 0, self.size * health_ratio, 3))
-                
-            surface.blit(enemy_surf, self.rect)
-            
-        # Draw enemy bullets
-        for bullet in self.bullets:
-            pygame.draw.rect(surface, bullet["color"], bullet["rect"], 0, 3)
+                pygame.draw.rect(surface, CYBER_RED, 
+                               view.rect((rect.x, rect.y, self.size * health_ratio, 3)))
 
-enemies = []
-enemy_timer = 0
+    def build_boss(self, phase, rings=3):
+        boss_surf = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+        
+        # Boss core
+        pygame.draw.circle(boss_surf, self.color, 
+                         (self.size//2, self.size//2), self.size//3)
+        
+        # Rotating rings
+        ring_time = phase / BOSS_RING_PHASES * (math.pi / 4)
+        for i in range(rings):
+            radius = self.size//2 - i * 5
+            points = []
+            for j in range(8):
+                angle = ring_time + j * math.pi / 4
+                x = self.size//2 + math.cos(angle) * radius
+                y = self.size//2 + math.sin(angle) * radius
+                points.append((x, y))
+            
+            for j in range(len(points)):
+                pygame.draw.line(boss_surf, CYBER_PINK, 
+                               points[j], points[(j+1)%len(points)], 2)
+        return boss_surf
 
 # ================= POWER-UPS =================
 class PowerUp:
-    def __init__(self, pos):
-        self.rect = pygame.Rect(pos[0], pos[1], 32, 32)
-        self.type = random.choice(["health", "shield", "speed", "weapon", "coin"])
-        self.float_offset = random.random() * math.pi * 2
+    __slots__ = ("id", "rect", "type", "float_offset", "collected", "color", "symbol", "life")
+
+    def __init__(self, pos, rng=random):
+        self.id = 0
+        self.rect = pygame.Rect(0, 0, 32, 32)
+        self.reset(pos, rng)
+
+    def reset(self, pos, rng=random):
+        self.rect.topleft = pos
+        self.type = rng.choice(["health", "shield", "speed", "weapon", "coin"])
+        self.float_offset = rng.random() * math.pi * 2
         self.collected = False
+        self.life = POWERUP_LIFETIME
         
         if self.type == "health":
             self.color = CYBER_GREEN
@@ -679,8 +1858,11 @@ class PowerUp:
             self.symbol = "$"
             
     def update(self):
+        # False once the power-up has expired or floated away
         self.float_offset += 0.05
         self.rect.y = int(self.rect.y + math.sin(self.float_offset) * 0.5)
+        self.life -= 1
+        return self.life > 0 and in_bounds(self.rect)
         
     def draw(self, surface):
         if self.collected:
@@ -688,14 +1870,16 @@ class PowerUp:
             
         # Glow effect
         glow_size = 40
-        glow_surf = pygame.Surface((glow_size, glow_size), pygame.SRCALPHA)
         glow_alpha = 100 + int(100 * math.sin(pygame.time.get_ticks() * 0.005))
-        pygame.draw.circle(glow_surf, (*self.color, glow_alpha), 
-                         (glow_size//2, glow_size//2), glow_size//2)
-        surface.blit(glow_surf, (self.rect.centerx - glow_size//2, 
-                               self.rect.centery - glow_size//2))
+        glow_surf = sprites.circle(view.length(glow_size), view.length(glow_size//2), self.color, glow_alpha)
+        surface.blit(glow_surf, view.pos(self.rect.centerx - glow_size//2, 
+                                         self.rect.centery - glow_size//2))
         
         # Main body
+        powerup_surf = view.sprite(("powerup", self.rect.size, self.color, self.symbol), self.build_body)
+        surface.blit(powerup_surf, view.pos(*self.rect.topleft))
+
+    def build_body(self):
         powerup_surf = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
         pygame.draw.circle(powerup_surf, self.color, 
                          (self.rect.width//2, self.rect.height//2), 
@@ -709,10 +1893,53 @@ class PowerUp:
         powerup_surf.blit(symbol, 
                          (self.rect.width//2 - symbol.get_width()//2,
                           self.rect.height//2 - symbol.get_height()//2))
-        
-        surface.blit(powerup_surf, self.rect)
+        return powerup_surf
+
+# ================= COLLISION =================
+def overlap_matrix(rects, pool):
+    # (len(rects), len(pool)) mask of Rect.colliderect between rects and bullets
+    n = pool.count
+    rects = np.asarray(rects, np.float64).reshape(-1, 4)
+    left, top = rects[:, 0:1], rects[:, 1:2]
+    right, bottom = left + rects[:, 2:3], top + rects[:, 3:4]
+    x, y = pool.x[:n], pool.y[:n]
+    return ((left < x + pool.w[:n]) & (x < right) &
+            (top < y + pool.h[:n]) & (y < bottom))
+
+def resolve_bullet_hits(pool, rects, hp, active):
+    """Narrow phase between every bullet in `pool` and a list of targets.
+
+    Matches the sequential rules: targets are resolved in order, each
+    bullet is consumed by the first target it hits, and a target stops
+    consuming bullets once its hp reaches zero. Returns the consumed
+    bullet indices per target, the damage dealt per target and the mask
+    of all consumed bullets.
+    """
+    n = pool.count
+    if n == 0 or len(rects) == 0:
+        return [np.empty(0, np.intp)] * len(rects), np.zeros(len(rects)), np.zeros(n, np.bool_)
+    hits = overlap_matrix(rects, pool) & np.asarray(active, np.bool_)[:, None]
+    damage = pool.damage[:n]
+    hp = np.asarray(hp, np.float64)
+
+    if hits.sum(axis=0).max() <= 1:
+        # No bullet touches two targets, so every row resolves independently
+        dealt = np.where(hits, damage, 0.0)
+        before = np.cumsum(dealt, axis=1) - dealt
+        consumed = hits & (before < hp[:, None])
+    else:
+        # Shared bullets go to the earliest target that still takes hits
+        consumed = np.zeros_like(hits)
+        taken = np.zeros(n, np.bool_)
+        for row in range(len(rects)):
+            row_hits = hits[row] & ~taken
+            dealt = np.where(row_hits, damage, 0.0)
+            before = np.cumsum(dealt) - dealt
+            consumed[row] = row_hits & (before < hp[row])
+            taken |= consumed[row]
 
-powerups = []
+    per_target = [np.flatnonzero(row) for row in consumed]
+    return per_target, np.where(consumed, damage, 0.0).sum(axis=1), consumed.any(axis=0)
 
 # ================= UI =================
 class Button:
@@ -731,7 +1958,7 @@ class Button:
         pygame.draw.rect(surface, color, self.rect, 0, 10)
         pygame.draw.rect(surface, NEON_WHITE, self.rect, 2, 10)
         
-        text_surf = FONT.render(self.text, True, NEON_WHITE)
+        text_surf = text_cache.render(FONT, self.text, NEON_WHITE)
         surface.blit(text_surf, 
                     (self.rect.centerx - text_surf.get_width()//2,
                      self.rect.centery - text_surf.get_height()//2))
@@ -739,295 +1966,465 @@ class Button:
     def is_clicked(self, mouse_pos, mouse_click):
         return self.rect.collidepoint(mouse_pos) and mouse_click
 
-# ================= GAME STATES =================
-class GameState:
-    MENU = 0
-    PLAYING = 1
-    UPGRADES = 2
-    GAME_OVER = 3
+# ================= REPLAYS =================
+REPLAY_MAGIC = b"NDRP"
+REPLAY_VERSION = 2
+UPGRADE_KEYS = ("damage", "speed", "fire_rate", "health", "shield")
 
-current_state = GameState.MENU
-score = 0
-level = 1
-combo = 1
-combo_timer = 0
-game_time = 0
-screen_shake = 0
-shake_intensity = 0
-
-# UI Buttons
-play_button = Button(WIDTH//2 - 100, HEIGHT//2, 200, 50, "START MISSION")
-shop_button = Button(WIDTH//2 - 100, HEIGHT//2 + 70, 200, 50, "UPGRADE HANGAR")
-quit_button = Button(WIDTH//2 - 100, HEIGHT//2 + 140, 200, 50, "EXIT TERMINAL")
-resume_button = Button(WIDTH//2 - 100, HEIGHT//2 - 60, 200, 50, "RESTART")
-menu_button = Button(WIDTH//2 - 100, HEIGHT//2 + 140, 200, 50, "MAIN MENU")
-
-# Upgrade buttons
-upgrade_buttons = [
-    Button(150, 150, 200, 50, "DAMAGE: " + str(save_data.upgrades["damage"])),
-    Button(150, 220, 200, 50, "SPEED: " + str(save_data.upgrades["speed"])),
-    Button(150, 290, 200, 50, "FIRE RATE: " + str(save_data.upgrades["fire_rate"])),
-    Button(150, 360, 200, 50, "HEALTH: " + str(save_data.upgrades["health"])),
-    Button(150, 430, 200, 50, "SHIELD: " + str(save_data.upgrades["shield"])),
-    Button(550, 150, 200, 50, "BACK")
-]
+class RandomStreams:
+    """Seeded random generators, one per simulation subsystem.
+
+    Every stream is derived from the run seed and its own name, so extra
+    draws in one subsystem never shift another's sequence.
+    """
+    def __init__(self, seed=None):
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.streams = {}
+
+    def get(self, name):
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = self.streams[name] = random.Random(f"{self.seed}:{name}")
+        return stream
+
+    def numpy(self, name):
+        return np.random.default_rng([self.seed, zlib.crc32(name.encode())])
+
+class Replay:
+    """One recorded mission: run seed, player loadout and one input byte per step.
+
+    The file is a fixed header followed by the zlib-compressed input bytes;
+    held keys compress to almost nothing.
+    """
+    HEADER = struct.Struct("<4sBQ5B2d3iI")
+
+    def __init__(self, seed, upgrades, loadout, inputs=b""):
+        self.seed = seed
+        self.upgrades = upgrades
+        self.loadout = loadout
+        self.inputs = bytearray(inputs)
+
+    @classmethod
+    def capture(cls, world):
+        # Start a recording from a freshly reset world
+        player = world.player
+        loadout = (player.speed, player.damage, player.fire_rate, player.max_health, player.coins)
+        return cls(world.random.seed, dict(player.upgrades), loadout)
+
+    def record(self, inputs):
+        self.inputs.append(inputs)
+
+    def start(self, world):
+        # Put `world` in the exact state the recording started from
+        player = world.player
+        player.upgrades.update(self.upgrades)
+        player.speed, player.damage, player.fire_rate, player.max_health, player.coins = self.loadout
+        world.reset(self.seed)
+
+    def save(self, path):
+        upgrades = [self.upgrades[key] for key in UPGRADE_KEYS]
+        header = self.HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, *upgrades,
+                                  *self.loadout, len(self.inputs))
+        with open(path, "wb") as f:
+            f.write(header + zlib.compress(bytes(self.inputs), 9))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        fields = cls.HEADER.unpack_from(data)
+        magic, version, seed = fields[:3]
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+        upgrades = dict(zip(UPGRADE_KEYS, fields[3:8]))
+        inputs = zlib.decompress(data[cls.HEADER.size:])
+        if len(inputs) != fields[-1]:
+            raise ValueError(f"{path} is truncated")
+        return cls(seed, upgrades, fields[8:13], inputs)
+
+# ================= ENTITIES =================
+EFFECT_CAPACITY = 256
+POWERUP_CAPACITY = 64
+
+class ObjectPool:
+    """Free list of reusable `cls` instances, at most `capacity` live at once.
+
+    acquire() hands back a released instance through its reset(*args) hook,
+    which must set every field __init__ does, and only builds a new one when
+    none is free. At capacity it returns None and counts the drop.
+    """
+    __slots__ = ("cls", "capacity", "free", "live", "high_water", "created", "dropped")
+
+    def __init__(self, cls, capacity):
+        self.cls = cls
+        self.capacity = capacity
+        self.free = []
+        self.live = 0
+        self.high_water = 0
+        self.created = 0
+        self.dropped = 0
+
+    def acquire(self, *args):
+        if self.live >= self.capacity:
+            self.dropped += 1
+            return None
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+        else:
+            obj = self.cls(*args)
+            self.created += 1
+        self.live += 1
+        self.high_water = max(self.high_water, self.live)
+        return obj
+
+    def release(self, obj):
+        self.live -= 1
+        self.free.append(obj)
+
+    def stats(self):
+        return {"live": self.live, "free": len(self.free), "high_water": self.high_water,
+                "created": self.created, "dropped": self.dropped}
+
+class EntityStore:
+    """Live entities of one kind in spawn order, addressed by stable handles.
+
+    add() stamps the entity's `id` with a fresh handle. Entities sit in an
+    insertion-ordered dict, so removing one is O(1) while iteration keeps
+    the spawn order that collision resolution and drawing depend on. With
+    a `pool`, spawn() acquires entities from it and removal releases them.
+    """
+    __slots__ = ("entities", "ids", "pool")
+
+    def __init__(self, ids=None, pool=None):
+        self.entities = {}
+        self.ids = ids or itertools.count(1)
+        self.pool = pool
+
+    def add(self, entity):
+        entity.id = next(self.ids)
+        self.entities[entity.id] = entity
+        return entity
+
+    def spawn(self, *args):
+        # None when the pool is at capacity
+        entity = self.pool.acquire(*args)
+        if entity is not None:
+            self.add(entity)
+        return entity
+
+    def get(self, handle):
+        return self.entities.get(handle)
+
+    def remove(self, handle):
+        entity = self.entities.pop(handle)
+        if self.pool:
+            self.pool.release(entity)
+
+    def remove_all(self, handles):
+        for handle in handles:
+            self.remove(handle)
+
+    def clear(self):
+        if self.pool:
+            for entity in self.entities.values():
+                self.pool.release(entity)
+        self.entities.clear()
+
+    def __iter__(self):
+        return iter(self.entities.values())
+
+    def __len__(self):
+        return len(self.entities)
+
+# ================= GAME WORLD =================
+INPUT_UP = 1
+INPUT_DOWN = 2
+INPUT_FIRE = 4
+
+def read_inputs(keys):
+    # Pack the pressed keys into an INPUT_* bitmask
+    inputs = 0
+    if keys[pygame.K_UP] or keys[pygame.K_w]:
+        inputs |= INPUT_UP
+    if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        inputs |= INPUT_DOWN
+    if keys[pygame.K_SPACE] or keys[pygame.K_z]:
+        inputs |= INPUT_FIRE
+    return inputs
+
+class GameWorld:
+    """Simulation state for one mission, advanced one frame per step().
+
+    Needs no display: the renderer reads this state and main() owns the
+    window, so the same world runs headless for balancing and tests.
+    """
+    def __init__(self, save=None, seed=None):
+        self.save = save or SaveData()
+        self.player = Player(self.save)
+        self.enemies = EntityStore(enemy_ids)
+        self.enemy_bullets = BulletPool()
+        self.powerups = EntityStore(pool=ObjectPool(PowerUp, POWERUP_CAPACITY))
+        self.particles = ParticleSystem()
+        self.effects = EntityStore(pool=ObjectPool(VisualEffect, EFFECT_CAPACITY))
+        self.score = 0
+        self.level = 1
+        self.combo = 1
+        self.combo_timer = 0
+        self.enemy_timer = 0
+        self.screen_shake = 0
+        self.shake_intensity = 0
+        self.game_over = False
+        self.frame = 0
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        self.random = RandomStreams(seed)
+        self.enemy_rng = self.random.get("enemies")
+        self.loot_rng = self.random.get("loot")
+        self.particles.rng = self.random.numpy("particles")
+
+    def reset(self, seed=None):
+        # Start a mission; the seed fixes everything it will do for given inputs
+        player = self.player
+        self.reseed(seed)
+        self.score = 0
+        self.level = 1
+        self.combo = 1
+        self.combo_timer = 0
+        self.enemy_timer = 0
+        self.screen_shake = 0
+        self.frame = 0
+        self.game_over = False
+        player.health = player.max_health
+        player.inv = 0
+        player.fire = 0
+        player.angle = 0
+        player.shield = False
+        player.shield_time = 0
+        player.trail.clear()
+        self.enemies.clear()
+        player.bullets.clear()
+        self.enemy_bullets.clear()
+        self.particles.clear()
+        self.effects.clear()
+        self.powerups.clear()
+        # Reset player position
+        player.rect.x = 80
+        player.rect.y = HEIGHT//2
+        player.prev_pos = player.rect.topleft
+
+    def add_effect(self, pos, effect_type, duration=30):
+        self.effects.spawn(pos, effect_type, duration)
+
+    def pool_stats(self):
+        particles = self.particles
+        return {"effects": self.effects.pool.stats(), "powerups": self.powerups.pool.stats(),
+                "particles": {"live": particles.count, "free": particles.capacity - particles.count,
+                              "high_water": particles.high_water, "dropped": particles.dropped}}
+
+    def digest(self):
+        # CRC of the simulation state, to check that two runs match bit for bit
+        player = self.player
+        state = (self.frame, self.score, self.level, self.combo, player.health, player.coins,
+                 tuple(player.rect), [(tuple(e.rect), e.hp) for e in self.enemies],
+                 [tuple(p.rect) for p in self.powerups])
+        crc = zlib.crc32(repr(state).encode())
+        for pool in (player.bullets, self.enemy_bullets):
+            crc = zlib.crc32(pool.x[:pool.count].tobytes() + pool.y[:pool.count].tobytes(), crc)
+        return zlib.crc32(self.particles.pos[:self.particles.count].tobytes(), crc)
+
+    def hurt_player(self):
+        # Returns True when this hit ends the mission
+        audio.play_sound("hurt")
+        self.player.health -= 1
+        self.player.inv = 60
+        if self.player.health <= 0:
+            self.game_over = True
+        return self.game_over
+
+    def step(self, inputs):
+        player = self.player
+        enemies = self.enemies
+        powerups = self.powerups
+        enemy_bullets = self.enemy_bullets
+        particles = self.particles
+        self.frame += 1
 
-# ================= MAIN GAME LOOP =================
-running = True
-while running:
-    delta_time = CLOCK.tick(FPS) / 1000.0
-    game_time += delta_time
-    
-    mouse_pos = pygame.mouse.get_pos()
-    mouse_click = False
-    
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_click = True
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                if current_state == GameState.PLAYING:
-                    current_state = GameState.MENU
-                elif current_state == GameState.UPGRADES:
-                    current_state = GameState.MENU
-            elif event.key == pygame.K_r and current_state == GameState.GAME_OVER:
-                # Reset game
-                current_state = GameState.PLAYING
-                score = 0
-                level = 1
-                player.health = player.max_health
-                enemies.clear()
-                player.bullets.clear()
-                particles.clear()
-                effects.clear()
-                powerups.clear()
-                # Reset player position
-                player.rect.x = 80
-                player.rect.y = HEIGHT//2
-    
-    # Clear screen
-    SCREEN.fill(DARK_BG)
-    
-    # Draw background with speed based on game state
-    bg_speed = 1.0
-    if current_state == GameState.PLAYING:
-        bg_speed = 1.5 + level * 0.1
-    draw_background(SCREEN, bg_speed)
-    
-    # Apply screen shake
-    shake_offset = (0, 0)
-    if screen_shake > 0:
-        screen_shake -= 1
-        shake_offset = (random.uniform(-shake_intensity, shake_intensity),
-                       random.uniform(-shake_intensity, shake_intensity))
-    
-    # Create a surface for game elements
-    game_surface = SCREEN if screen_shake == 0 else pygame.Surface((WIDTH, HEIGHT))
-    if screen_shake > 0:
-        game_surface.fill(DARK_BG)
-    
-    # Update based on game state
-    if current_state == GameState.MENU:
-        # Update buttons
-        play_button.update(mouse_pos)
-        shop_button.update(mouse_pos)
-        quit_button.update(mouse_pos)
-        
-        # Check clicks
-        if play_button.is_clicked(mouse_pos, mouse_click):
-            current_state = GameState.PLAYING
-            # Reset game state when starting
-            score = 0
-            level = 1
-            player.health = player.max_health
-            enemies.clear()
-            player.bullets.clear()
-            particles.clear()
-            effects.clear()
-            powerups.clear()
-            player.rect.x = 80
-            player.rect.y = HEIGHT//2
-        elif shop_button.is_clicked(mouse_pos, mouse_click):
-            current_state = GameState.UPGRADES
-        elif quit_button.is_clicked(mouse_pos, mouse_click):
-            running = False
-            
-        # Draw menu
-        title_text = FONT_TITLE.render("NEO DODGE", True, CYBER_BLUE)
-        game_surface.blit(title_text, (WIDTH//2 - title_text.get_width()//2, 80))
-        
-        subtitle = FONT.render("CYBER ARENA", True, CYBER_PINK)
-        game_surface.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 160))
-        
-        high_score_text = FONT.render(f"HIGH SCORE: {save_data.high_score}", True, CYBER_YELLOW)
-        game_surface.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, 220))
-        
-        play_button.draw(game_surface)
-        shop_button.draw(game_surface)
-        quit_button.draw(game_surface)
-        
-        # Draw animated ships in background
-        for i in range(3):
-            x = 100 + i * 250
-            y = 400 + math.sin(game_time + i) * 20
-            pygame.draw.polygon(game_surface, CYBER_BLUE, 
-                              [(x, y), (x+40, y-20), (x+40, y+20)])
-            
-    elif current_state == GameState.PLAYING:
-        keys = pygame.key.get_pressed()
-        
         # Update player
-        player.update(keys)
-        
+        player.update(inputs, self)
+        profiler.lap("player")
+
         # Spawn enemies
-        enemy_timer += 1
-        if enemy_timer > max(20, 60 - level * 2):
-            if level % BOSS_LEVEL_INTERVAL == 0 and not any(e.boss for e in enemies):
-                enemies.append(Enemy(boss=True, level=level))
+        self.enemy_timer += 1
+        if self.enemy_timer > max(20, 60 - self.level * 2):
+            if self.level % BOSS_LEVEL_INTERVAL == 0 and not any(e.boss for e in enemies):
+                enemies.add(Enemy(boss=True, level=self.level, rng=self.enemy_rng))
             else:
-                enemies.append(Enemy(level=level))
-            enemy_timer = 0
-            
+                enemies.add(Enemy(level=self.level, rng=self.enemy_rng))
+            self.enemy_timer = 0
+
         # Spawn power-ups randomly
-        if random.random() < 0.01:
-            powerups.append(PowerUp((random.randint(WIDTH//2, WIDTH-50), 
-                                   random.randint(50, HEIGHT-50))))
-        
+        loot_rng = self.loot_rng
+        if loot_rng.random() < 0.01:
+            powerups.spawn((loot_rng.randint(WIDTH//2, WIDTH-50),
+                            loot_rng.randint(50, HEIGHT-50)), loot_rng)
+
         # Update player bullets
-        for bullet in player.bullets[:]:
-            bullet["rect"].x += 12
-            if bullet["rect"].left > WIDTH:
-                player.bullets.remove(bullet)
-            
-        # Update enemies
-        for enemy in enemies[:]:
-            enemy.update(player.rect.center)
-            
+        player.bullets.step()
+        player.bullets.cull()
+
+        # Move every enemy and enemy bullet first; the checks below only
+        # read final positions
+        for enemy in enemies:
+            enemy.update(player.rect.center, enemy_bullets)
+        enemy_bullets.step()
+        enemy_bullets.cull()
+        profiler.lap("enemies")
+        # Only the player is tested against enemies and power-ups, so one
+        # rect scan beats building a spatial index every step
+        near_enemies = set(player.rect.collidelistall([enemy.rect for enemy in enemies]))
+        near_enemy_bullets = {}
+        for b in np.flatnonzero(overlap_matrix([player.rect], enemy_bullets)[0]).tolist():
+            near_enemy_bullets.setdefault(int(enemy_bullets.owner[b]), []).append(b)
+        bullet_hits, _, used_bullets = resolve_bullet_hits(
+            player.bullets,
+            [enemy.rect for enemy in enemies],
+            [enemy.hp for enemy in enemies],
+            [in_bounds(enemy.rect) for enemy in enemies])
+        used_enemy_bullets = set()
+        removed_enemies = set()
+
+        # Resolve enemies in spawn order
+        for i, enemy in enumerate(enemies):
             # Check if enemy is off screen
-            if enemy.rect.right < -50:
-                enemies.remove(enemy)
-                combo = 1
+            if not in_bounds(enemy.rect):
+                removed_enemies.add(enemy.id)
+                self.combo = 1
                 continue
-                
-            # Check collision with player bullets
-            for bullet in player.bullets[:]:
-                if bullet["rect"].colliderect(enemy.rect):
-                    enemy.hp -= bullet["damage"]
-                    player.bullets.remove(bullet)
-                    
-                    # Hit effect
-                    add_effect(bullet["rect"].center, "hit", 15)
-                    for _ in range(10):
-                        particles.append(Particle(
-                            bullet["rect"].center,
-                            enemy.color,
-                            size=random.randint(2, 4),
-                            velocity=[random.uniform(-3, 3), random.uniform(-3, 3)],
-                            lifetime=20
-                        ))
-                    
-                    if enemy.hp <= 0:
-                        # Enemy destroyed
-                        enemies.remove(enemy)
-                        
-                        # Score calculation
-                        base_score = 100 if enemy.boss else 10
-                        score += base_score * combo
-                        player.coins += 1 if not enemy.boss else 5
-                        
-                        # Combo system
-                        combo = min(combo + 1, 10)
-                        combo_timer = 180  # 3 seconds to maintain combo
-                        
-                        # Explosion effect
-                        add_effect(enemy.rect.center, "explosion", 40)
-                        for _ in range(30):
-                            particles.append(Particle(
-                                enemy.rect.center,
-                                enemy.color,
-                                size=random.randint(3, 6),
-                                velocity=[random.uniform(-8, 8), random.uniform(-8, 8)],
-                                lifetime=random.randint(20, 40)
-                            ))
-                        
-                        # Screen shake
-                        screen_shake = 20 if enemy.boss else 10
-                        shake_intensity = 5 if enemy.boss else 3
-                        
-                        # Chance to drop power-up
-                        if random.random() < 0.3:
-                            powerups.append(PowerUp((enemy.rect.centerx, enemy.rect.centery)))
-                            
-                        # Check for level up
-                        if score // 1000 + 1 > level:
-                            level += 1
-                            add_effect((WIDTH//2, HEIGHT//2), "powerup", 60)
-                            
-                        break
-                        
+
+            # Apply player bullet hits in firing order
+            for b in bullet_hits[i].tolist():
+                enemy.hp -= float(player.bullets.damage[b])
+
+                # Hit effect
+                hit_pos = player.bullets.center(b)
+                self.add_effect(hit_pos, "hit", 15)
+                audio.play_sound("hit")
+                particles.burst(
+                    hit_pos,
+                    enemy.color,
+                    10,
+                    size=(2, 4),
+                    velocity=((-3, 3), (-3, 3)),
+                    lifetime=20
+                )
+
+                if enemy.hp <= 0:
+                    # Enemy destroyed
+                    removed_enemies.add(enemy.id)
+
+                    # Score calculation
+                    base_score = 100 if enemy.boss else 10
+                    self.score += base_score * self.combo
+                    player.coins += 1 if not enemy.boss else 5
+
+                    # Combo system
+                    self.combo = min(self.combo + 1, 10)
+                    self.combo_timer = 180  # 3 seconds to maintain combo
+
+                    # Explosion effect
+                    self.add_effect(enemy.rect.center, "explosion", 40)
+                    audio.play_sound("explosion")
+                    particles.burst(
+                        enemy.rect.center,
+                        enemy.color,
+                        30,
+                        size=(3, 6),
+                        velocity=((-8, 8), (-8, 8)),
+                        lifetime=(20, 40)
+                    )
+
+                    # Screen shake
+                    self.screen_shake = 20 if enemy.boss else 10
+                    self.shake_intensity = 5 if enemy.boss else 3
+
+                    # Chance to drop power-up
+                    if loot_rng.random() < 0.3:
+                        powerups.spawn((enemy.rect.centerx, enemy.rect.centery), loot_rng)
+
+                    # Check for level up
+                    if self.score // 1000 + 1 > self.level:
+                        self.level += 1
+                        self.add_effect((WIDTH//2, HEIGHT//2), "powerup", 60)
+                        audio.play_sound("level_up")
+
+                    break
+
             # Check collision with player
-            if enemy.rect.colliderect(player.rect) and player.inv == 0:
+            if i in near_enemies and player.inv == 0:
                 if player.shield:
                     player.shield_time = 0
-                    add_effect(player.rect.center, "hit", 20)
+                    self.add_effect(player.rect.center, "hit", 20)
                 else:
-                    player.health -= 1
-                    player.inv = 60
-                    screen_shake = 15
-                    shake_intensity = 4
-                    
+                    self.hurt_player()
+                    self.screen_shake = 15
+                    self.shake_intensity = 4
+
                     # Damage effect
-                    add_effect(player.rect.center, "hit", 20)
-                    for _ in range(20):
-                        particles.append(Particle(
-                            player.rect.center,
-                            CYBER_RED,
-                            size=random.randint(2, 5),
-                            velocity=[random.uniform(-5, 5), random.uniform(-5, 5)],
-                            lifetime=25
-                        ))
-                    
-                    if player.health <= 0:
-                        # Game over
-                        current_state = GameState.GAME_OVER
-                        save_data.high_score = max(save_data.high_score, score)
-                        save_data.total_kills += score // 10
-                        save_data.coins = player.coins
-                        save_data.save()
-                        
+                    self.add_effect(player.rect.center, "hit", 20)
+                    particles.burst(
+                        player.rect.center,
+                        CYBER_RED,
+                        20,
+                        size=(2, 5),
+                        velocity=((-5, 5), (-5, 5)),
+                        lifetime=25
+                    )
+
                 # Remove non-boss enemies on collision
                 if not enemy.boss:
-                    enemies.remove(enemy)
-                    
+                    removed_enemies.add(enemy.id)
+
             # Check enemy bullets collision with player
-            for bullet in enemy.bullets[:]:
-                if bullet["rect"].colliderect(player.rect) and player.inv == 0:
+            for b in near_enemy_bullets.get(enemy.id, ()):
+                if player.inv == 0:
+                    used_enemy_bullets.add(b)
                     if player.shield:
                         player.shield_time = max(0, player.shield_time - 60)
-                        enemy.bullets.remove(bullet)
                     else:
-                        player.health -= 1
-                        player.inv = 60
-                        enemy.bullets.remove(bullet)
-                        
-                        if player.health <= 0:
-                            current_state = GameState.GAME_OVER
-                            save_data.high_score = max(save_data.high_score, score)
-                            save_data.total_kills += score // 10
-                            save_data.coins = player.coins
-                            save_data.save()
-                            
-        # Update power-ups
-        for powerup in powerups[:]:
-            powerup.update()
-            
-            if powerup.rect.colliderect(player.rect) and not powerup.collected:
+                        self.hurt_player()
+
+        # Bullets whose enemy is gone still hit, after every owned one
+        for b in near_enemy_bullets.get(OWNER_WORLD, ()):
+            if player.inv == 0:
+                used_enemy_bullets.add(b)
+                if player.shield:
+                    player.shield_time = max(0, player.shield_time - 60)
+                else:
+                    self.hurt_player()
+
+        # Drop consumed bullets and dead enemies in one pass each
+        player.bullets.remove_mask(used_bullets)
+        if used_enemy_bullets:
+            enemy_bullets.remove_indices(used_enemy_bullets)
+        if removed_enemies:
+            # Bullets still in flight outlive their enemy
+            enemy_bullets.transfer_owners(removed_enemies)
+            enemies.remove_all(removed_enemies)
+        profiler.lap("collision")
+
+        # Update power-ups, dropping expired ones
+        powerups.remove_all([powerup.id for powerup in powerups if not powerup.update()])
+        near_powerups = set(player.rect.collidelistall([powerup.rect for powerup in powerups]))
+        collected = []
+        for i, powerup in enumerate(powerups):
+            if i in near_powerups and not powerup.collected:
                 powerup.collected = True
-                add_effect(powerup.rect.center, "powerup", 30)
-                
+                collected.append(powerup.id)
+                self.add_effect(powerup.rect.center, "powerup", 30)
+                audio.play_sound("powerup")
+
                 # Apply power-up effect
                 if powerup.type == "health":
                     player.health = min(player.max_health, player.health + 1)
@@ -1038,211 +2435,667 @@ while running:
                 elif powerup.type == "weapon":
                     player.damage += 0.5
                 elif powerup.type == "coin":
-                    player.coins += random.randint(1, 5)
-                    
-                powerups.remove(powerup)
-                
+                    player.coins += loot_rng.randint(1, 5)
+        powerups.remove_all(collected)
+        profiler.lap("powerups")
+
         # Update combo timer
-        if combo_timer > 0:
-            combo_timer -= 1
-            if combo_timer == 0:
-                combo = 1
-                
+        if self.combo_timer > 0:
+            self.combo_timer -= 1
+            if self.combo_timer == 0:
+                self.combo = 1
+
         # Update particles
-        particles = [p for p in particles if p.update()]
-        
+        particles.update()
+        profiler.lap("particles")
+
         # Update effects
-        effects = [e for e in effects if e.update()]
-        
-        # Draw everything
-        for p in particles:
-            p.draw(game_surface)
-            
-        for e in effects:
-            e.draw(game_surface)
-            
-        for bullet in player.bullets:
-            pygame.draw.rect(game_surface, bullet["color"], bullet["rect"], 0, 3)
-            
-        for enemy in enemies:
-            enemy.draw(game_surface)
-            
-        for powerup in powerups:
-            powerup.draw(game_surface)
-            
-        player.draw(game_surface)
-        
-        # Draw UI
-        # Top bar
-        top_bar = pygame.Surface((WIDTH, 60), pygame.SRCALPHA)
-        top_bar.fill((*UI_BLUE, 200))
-        game_surface.blit(top_bar, (0, 0))
-        pygame.draw.line(game_surface, CYBER_BLUE, (0, 60), (WIDTH, 60), 3)
-        
-        # Score
-        draw_text(game_surface, f"SCORE: {score:06d}", FONT, NEON_WHITE, 20, 15)
-        draw_text(game_surface, f"HIGH: {save_data.high_score:06d}", FONT, CYBER_YELLOW, 200, 15)
-        draw_text(game_surface, f"LEVEL: {level:02d}", FONT, CYBER_GREEN, 380, 15)
-        
-        # Combo
-        if combo > 1:
-            combo_text = FONT_LARGE.render(f"x{combo} COMBO!", True, CYBER_PINK)
-            combo_alpha = min(255, combo_timer * 2)
-            combo_text.set_alpha(combo_alpha)
-            game_surface.blit(combo_text, (WIDTH//2 - combo_text.get_width()//2, 80))
-            
-        # Coins
-        coin_text = FONT.render(f"COINS: {player.coins}", True, CYBER_YELLOW)
-        game_surface.blit(coin_text, (WIDTH - 150, 15))
-        
-        # Health bar
-        health_width = 200
-        health_height = 20
-        health_x = WIDTH - health_width - 20
-        health_y = 45
-        
+        self.effects.remove_all([effect.id for effect in self.effects if not effect.update()])
+        profiler.lap("effects")
+
+def autopilot(world):
+    # Simple scripted pilot for headless runs: fire and chase the nearest enemy
+    inputs = INPUT_FIRE
+    player = world.player
+    if world.enemies:
+        target = min(world.enemies, key=lambda e: e.rect.x)
+        if target.rect.centery < player.rect.centery - 10:
+            inputs |= INPUT_UP
+        elif target.rect.centery > player.rect.centery + 10:
+            inputs |= INPUT_DOWN
+    return inputs
+
+def run_headless(frames, seed=None, record=None, replay=None):
+    # Simulate `frames` steps without a display and report the outcome.
+    # Recording or replaying covers a single mission.
+    world = GameWorld(seed=seed)
+    if replay is not None:
+        replay.start(world)
+        frames = len(replay.inputs)
+    recording = Replay.capture(world) if record else None
+    missions = 1
+    steps = 0
+    start = time.perf_counter()
+    while steps < frames:
+        profiler.frame()
+        inputs = replay.inputs[steps] if replay is not None else autopilot(world)
+        if recording is not None:
+            recording.record(inputs)
+        world.step(inputs)
+        steps += 1
+        profiler.sample(world)
+        if world.game_over:
+            if replay is not None or recording is not None:
+                break
+            world.reset(None if seed is None else seed + missions)
+            missions += 1
+    elapsed = time.perf_counter() - start
+    if recording is not None:
+        recording.save(record)
+    print(f"{steps} frames in {elapsed:.2f}s ({steps / max(elapsed, 1e-9):.0f} fps), "
+          f"missions: {missions}, score: {world.score}, level: {world.level}, "
+          f"digest: {world.digest():08x}")
+    return world
+
+# ================= HUD =================
+class Widget:
+    """A HUD element that keeps its surface until its bound value changes.
+
+    `bind(world)` returns the value shown and `build(value)` renders it
+    (or returns None to hide the widget). The surface is placed with
+    pygame.Rect anchor keywords such as topleft=(20, 15). An optional
+    `fade(world)` gives the alpha to draw at without rebuilding; build()
+    must then return a surface of its own, not a cached one.
+    """
+    def __init__(self, bind, build, fade=None, **anchor):
+        self.bind = bind
+        self.build = build
+        self.fade = fade
+        self.anchor = anchor
+        self.value = None
+        self.alpha = None
+        self.surface = None
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.built = False
+
+    def update(self, world):
+        # Re-render only when the bound value changed
+        value = self.bind(world)
+        if self.fade:
+            self.alpha = self.fade(world)
+        if self.built and value == self.value:
+            return
+        self.value = value
+        self.surface = self.build(value)
+        self.built = True
+        self.rect = self.surface.get_rect(**self.anchor) if self.surface else pygame.Rect(0, 0, 0, 0)
+
+    def draw(self, surface):
+        if self.surface is not None:
+            if self.fade:
+                self.surface.set_alpha(self.alpha)
+            surface.blit(self.surface, self.rect)
+
+def compose_text(text, font, color):
+    # Standalone surface of `text` built from the text cache and digit atlas
+    surf = pygame.Surface(text_cache.size(text, font, color), pygame.SRCALPHA)
+    text_cache.draw(surf, text, font, color, (0, 0), pygame.BLEND_RGBA_MAX)
+    return surf
+
+class HudLayer:
+    """Retained PLAYING HUD.
+
+    The top bar is baked once and every readout is a Widget, so a frame
+    where nothing changed is a handful of blits.
+    """
+    BAR_HEIGHT = 60
+    HEALTH_SIZE = (200, 20)
+
+    def __init__(self):
+        self.bar = None
+        health_x = WIDTH - self.HEALTH_SIZE[0] - 20
+        self.widgets = [
+            Widget(lambda world: world.score,
+                   lambda score: compose_text(f"SCORE: {score:06d}", FONT, NEON_WHITE),
+                   topleft=(20, 15)),
+            Widget(lambda world: world.save.high_score,
+                   lambda high: compose_text(f"HIGH: {high:06d}", FONT, CYBER_YELLOW),
+                   topleft=(200, 15)),
+            Widget(lambda world: world.level,
+                   lambda level: compose_text(f"LEVEL: {level:02d}", FONT, CYBER_GREEN),
+                   topleft=(380, 15)),
+            Widget(lambda world: world.player.coins,
+                   lambda coins: text_cache.render(FONT, f"COINS: {coins}", CYBER_YELLOW),
+                   topleft=(WIDTH - 150, 15)),
+            Widget(lambda world: (world.player.health, world.player.max_health),
+                   self.build_health, topleft=(health_x, 45)),
+            Widget(lambda world: world.combo if world.combo > 1 else None,
+                   self.build_combo, fade=lambda world: min(255, world.combo_timer * 2),
+                   midtop=(WIDTH//2, 80)),
+            Widget(lambda world: None,
+                   lambda _: text_cache.render(FONT_SMALL, "ARROWS/WASD: MOVE | SPACE/Z: FIRE | ESC: MENU", CYBER_BLUE),
+                   midtop=(WIDTH//2, HEIGHT - 30)),
+        ]
+
+    def build_bar(self):
+        bar = pygame.Surface((WIDTH, self.BAR_HEIGHT + 2), pygame.SRCALPHA)
+        bar.fill((*UI_BLUE, 200), (0, 0, WIDTH, self.BAR_HEIGHT))
+        pygame.draw.line(bar, CYBER_BLUE, (0, self.BAR_HEIGHT), (WIDTH, self.BAR_HEIGHT), 3)
+        if pygame.display.get_surface() is not None:
+            bar = bar.convert_alpha()
+        return bar
+
+    def build_health(self, value):
+        health, max_health = value
+        width, height = self.HEALTH_SIZE
+        surf = pygame.Surface(self.HEALTH_SIZE, pygame.SRCALPHA)
+
         # Background
-        pygame.draw.rect(game_surface, (50, 50, 50), 
-                        (health_x, health_y, health_width, health_height), 0, 10)
-        
+        pygame.draw.rect(surf, (50, 50, 50), (0, 0, width, height), 0, 10)
+
         # Health fill
-        health_ratio = player.health / player.max_health
-        health_fill_width = health_width * health_ratio
+        health_ratio = health / max_health
         health_color = CYBER_GREEN if health_ratio > 0.5 else CYBER_YELLOW if health_ratio > 0.2 else CYBER_RED
-        pygame.draw.rect(game_surface, health_color, 
-                        (health_x, health_y, health_fill_width, health_height), 0, 10)
-        
+        pygame.draw.rect(surf, health_color, (0, 0, width * health_ratio, height), 0, 10)
+
         # Border
-        pygame.draw.rect(game_surface, NEON_WHITE, 
-                        (health_x, health_y, health_width, health_height), 2, 10)
-        
+        pygame.draw.rect(surf, NEON_WHITE, (0, 0, width, height), 2, 10)
+
         # Health text
-        health_text = FONT_SMALL.render(f"SHIELD: {player.health}/{player.max_health}", True, NEON_WHITE)
-        game_surface.blit(health_text, (health_x + 10, health_y + 2))
-        
-        # Controls hint
-        controls = FONT_SMALL.render("ARROWS/WASD: MOVE | SPACE/Z: FIRE | ESC: MENU", True, CYBER_BLUE)
-        game_surface.blit(controls, (WIDTH//2 - controls.get_width()//2, HEIGHT - 30))
-        
-    elif current_state == GameState.UPGRADES:
+        health_text = text_cache.render(FONT_SMALL, f"SHIELD: {health}/{max_health}", NEON_WHITE)
+        surf.blit(health_text, (10, 2))
+        return surf
+
+    def build_combo(self, combo):
+        if combo is None:
+            return None
+        # A copy, the widget fades it without touching the cached text
+        return text_cache.render(FONT_LARGE, f"x{combo} COMBO!", CYBER_PINK).copy()
+
+    def update(self, world):
+        if self.bar is None:
+            self.bar = self.build_bar()
+        for widget in self.widgets:
+            widget.update(world)
+
+    def draw(self, surface):
+        surface.blit(self.bar, (0, 0))
+        for widget in self.widgets:
+            widget.draw(surface)
+
+# ================= RENDERER =================
+class GameRenderer:
+    """Draws a GameWorld; never changes simulation state."""
+    def __init__(self):
+        self.background = BackgroundCompositor()
+        self.particles = ParticleRenderer()
+        self.hud = HudLayer()
+        self.targets = RenderTargets()
+        archetypes.convert()
+
+    def set_tier(self, tier):
+        view.tier = tier
+        self.particles.quality = tier.particles
+        self.particles.share = tier.particle_share
+
+    def draw_background(self, surface):
+        self.background.draw(surface)
+        profiler.lap("background")
+
+    def draw_world(self, surface, world, alpha=1.0):
+        # alpha is how far the frame sits between the last two simulation steps
+        self.particles.draw(surface, world.particles, alpha)
+        profiler.lap("particle draw")
+
+        for e in world.effects:
+            e.draw(surface)
+        profiler.lap("effects draw")
+
+        world.player.bullets.draw(surface, alpha)
+
+        for enemy in world.enemies:
+            enemy.draw(surface, alpha)
+        world.enemy_bullets.draw(surface, alpha)
+
+        for powerup in world.powerups:
+            powerup.draw(surface)
+
+        world.player.draw(surface, alpha)
+        profiler.lap("world draw")
+
+    def draw_hud(self, surface, world):
+        self.hud.update(world)
+        self.hud.draw(surface)
+
+# ================= TIMING =================
+class FixedTimestep:
+    """Turns variable frame times into fixed 1/FPS simulation steps.
+
+    All game logic is tuned per frame at FPS, so it only ever advances in
+    whole steps; the leftover fraction is exposed as `alpha` for render
+    interpolation. After a stall at most MAX_CATCHUP_STEPS are replayed
+    and the rest of the backlog is dropped. While catching up, drawing is
+    skipped for up to MAX_FRAME_SKIP frames in a row.
+    """
+    def __init__(self, rate=FPS):
+        self.dt = 1.0 / rate
+        self.accumulator = 0.0
+        self.skipped = 0
+        self.dropped = 0
+
+    def advance(self, frame_time):
+        self.accumulator += min(frame_time, MAX_FRAME_TIME)
+        steps = int(self.accumulator / self.dt + 1e-9)
+        if steps > MAX_CATCHUP_STEPS:
+            self.dropped += steps - MAX_CATCHUP_STEPS
+            steps = MAX_CATCHUP_STEPS
+            self.accumulator %= self.dt
+        else:
+            self.accumulator = max(0.0, self.accumulator - steps * self.dt)
+        return steps
+
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.dt)
+
+    def should_render(self, steps):
+        # One extra step is normal clock jitter; more means we are behind
+        if steps > 2 and self.skipped < MAX_FRAME_SKIP:
+            self.skipped += 1
+            return False
+        self.skipped = 0
+        return True
+
+QUALITY_BUDGET_MS = 0.8 * 1000 / FPS
+QUALITY_HEADROOM = 0.5
+QUALITY_PATIENCE = 30
+
+class QualityGovernor:
+    """Picks the QualityTier to draw at from measured frame work.
+
+    Work time is Clock.get_rawtime(), the frame minus its sleep, smoothed
+    over a few frames. QUALITY_PATIENCE frames over QUALITY_BUDGET_MS step
+    down one entry of QUALITY_TIERS; four times as long under
+    QUALITY_HEADROOM of the budget step back up, so the tier does not flap.
+    A pinned tier never moves, and a pinned scale overrides the tier's.
+    """
+    def __init__(self, tier=None, scale=None):
+        self.pinned = tier is not None
+        self.index = tier or 0
+        self.fixed_scale = scale
+        self.average = 0.0
+        self.over = 0
+        self.under = 0
+        self.changes = 0
+
+    @property
+    def tier(self):
+        return QUALITY_TIERS[self.index]
+
+    @property
+    def scale(self):
+        return self.fixed_scale or self.tier.scale
+
+    def update(self, work_ms):
+        self.average += (work_ms - self.average) * 0.1
+        if self.pinned:
+            return
+        if self.average > QUALITY_BUDGET_MS:
+            self.over += 1
+            self.under = 0
+        elif self.average < QUALITY_BUDGET_MS * QUALITY_HEADROOM:
+            self.under += 1
+            self.over = 0
+        else:
+            self.over = self.under = 0
+
+        if self.over >= QUALITY_PATIENCE and self.index < len(QUALITY_TIERS) - 1:
+            self.index += 1
+            self.over = 0
+            self.changes += 1
+        elif self.under >= QUALITY_PATIENCE * 4 and self.index > 0:
+            self.index -= 1
+            self.under = 0
+            self.changes += 1
+
+# ================= GAME STATES =================
+class GameState:
+    MENU = 0
+    PLAYING = 1
+    UPGRADES = 2
+    GAME_OVER = 3
+
+class Game:
+    """Window-side state machine: menus, input and the frame loop."""
+    def __init__(self, screen, save, seed=None, record=None, replay=None):
+        self.screen = screen
+        self.save = save
+        self.seed = seed
+        self.record_path = record
+        self.recording = None
+        self.replay = replay
+        self.replay_step = 0
+        self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep()
+        self.quality = QualityGovernor()
+        self.world = GameWorld(save, seed)
+        self.renderer = GameRenderer()
+        self.state = GameState.MENU
+        if replay is not None:
+            replay.start(self.world)
+            self.state = GameState.PLAYING
+            audio.start()
+            audio.play_music()
+        self.running = True
+        self.game_time = 0
+
+        # UI Buttons
+        self.play_button = Button(WIDTH//2 - 100, HEIGHT//2, 200, 50, "START MISSION")
+        self.shop_button = Button(WIDTH//2 - 100, HEIGHT//2 + 70, 200, 50, "UPGRADE HANGAR")
+        self.quit_button = Button(WIDTH//2 - 100, HEIGHT//2 + 140, 200, 50, "EXIT TERMINAL")
+        self.resume_button = Button(WIDTH//2 - 100, HEIGHT//2 - 60, 200, 50, "RESTART")
+        self.menu_button = Button(WIDTH//2 - 100, HEIGHT//2 + 140, 200, 50, "MAIN MENU")
+
+        # Upgrade buttons, built when the hangar first opens
+        self.upgrade_buttons = None
+
+    def shop_buttons(self):
+        if self.upgrade_buttons is None:
+            upgrades = self.save.upgrades
+            self.upgrade_buttons = [
+                Button(150, 150, 200, 50, "DAMAGE: " + str(upgrades["damage"])),
+                Button(150, 220, 200, 50, "SPEED: " + str(upgrades["speed"])),
+                Button(150, 290, 200, 50, "FIRE RATE: " + str(upgrades["fire_rate"])),
+                Button(150, 360, 200, 50, "HEALTH: " + str(upgrades["health"])),
+                Button(150, 430, 200, 50, "SHIELD: " + str(upgrades["shield"])),
+                Button(550, 150, 200, 50, "BACK")
+            ]
+        return self.upgrade_buttons
+
+    def start_mission(self):
+        self.state = GameState.PLAYING
+        self.replay = None
+        self.world.reset(self.seed)
+        if self.record_path:
+            self.recording = Replay.capture(self.world)
+        # The mixer opens and the sound bank is built here, not mid-frame
+        audio.start()
+        audio.play_music()
+
+    def stop_recording(self):
+        if self.recording is not None:
+            self.recording.save(self.record_path)
+            self.recording = None
+
+    def end_mission(self):
+        world = self.world
+        self.state = GameState.GAME_OVER
+        self.stop_recording()
+        audio.stop_music()
+        self.save.high_score = max(self.save.high_score, world.score)
+        self.save.total_kills += world.score // 10
+        self.save.coins = world.player.coins
+        self.save.save()
+
+    def handle_events(self):
+        mouse_click = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                mouse_click = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    if self.state in (GameState.PLAYING, GameState.UPGRADES):
+                        self.state = GameState.MENU
+                elif event.key == pygame.K_r and self.state == GameState.GAME_OVER:
+                    self.start_mission()
+                elif event.key == pygame.K_F3:
+                    profiler.toggle()
+        return mouse_click
+
+    def update(self, mouse_pos, mouse_click):
+        if self.state == GameState.MENU:
+            self.play_button.update(mouse_pos)
+            self.shop_button.update(mouse_pos)
+            self.quit_button.update(mouse_pos)
+
+            if self.play_button.is_clicked(mouse_pos, mouse_click):
+                self.start_mission()
+            elif self.shop_button.is_clicked(mouse_pos, mouse_click):
+                self.state = GameState.UPGRADES
+            elif self.quit_button.is_clicked(mouse_pos, mouse_click):
+                self.running = False
+
+        elif self.state == GameState.UPGRADES:
+            self.update_shop(mouse_pos, mouse_click)
+
+        elif self.state == GameState.GAME_OVER:
+            self.resume_button.text = f"RESTART (SCORE: {self.world.score})"
+            self.resume_button.update(mouse_pos)
+            self.menu_button.update(mouse_pos)
+
+            if self.resume_button.is_clicked(mouse_pos, mouse_click):
+                self.start_mission()
+            elif self.menu_button.is_clicked(mouse_pos, mouse_click):
+                self.state = GameState.MENU
+
+    def update_shop(self, mouse_pos, mouse_click):
+        upgrades = self.save.upgrades
+        player = self.world.player
+        upgrade_buttons = self.shop_buttons()
+
         # Update upgrade buttons
-        upgrade_buttons[0].text = f"DAMAGE: {save_data.upgrades['damage']}/5 - {50 * (save_data.upgrades['damage'] + 1)} COINS"
-        upgrade_buttons[1].text = f"SPEED: {save_data.upgrades['speed']}/5 - {40 * (save_data.upgrades['speed'] + 1)} COINS"
-        upgrade_buttons[2].text = f"FIRE RATE: {save_data.upgrades['fire_rate']}/5 - {60 * (save_data.upgrades['fire_rate'] + 1)} COINS"
-        upgrade_buttons[3].text = f"HEALTH: {save_data.upgrades['health']}/5 - {80 * (save_data.upgrades['health'] + 1)} COINS"
-        upgrade_buttons[4].text = f"SHIELD: {save_data.upgrades['shield']}/5 - {70 * (save_data.upgrades['shield'] + 1)} COINS"
-        
+        upgrade_buttons[0].text = f"DAMAGE: {upgrades['damage']}/5 - {50 * (upgrades['damage'] + 1)} COINS"
+        upgrade_buttons[1].text = f"SPEED: {upgrades['speed']}/5 - {40 * (upgrades['speed'] + 1)} COINS"
+        upgrade_buttons[2].text = f"FIRE RATE: {upgrades['fire_rate']}/5 - {60 * (upgrades['fire_rate'] + 1)} COINS"
+        upgrade_buttons[3].text = f"HEALTH: {upgrades['health']}/5 - {80 * (upgrades['health'] + 1)} COINS"
+        upgrade_buttons[4].text = f"SHIELD: {upgrades['shield']}/5 - {70 * (upgrades['shield'] + 1)} COINS"
+
         for button in upgrade_buttons:
             button.update(mouse_pos)
-            
+
         # Check for upgrades
         if mouse_click:
             for i, button in enumerate(upgrade_buttons):
                 if button.is_clicked(mouse_pos, True):
-                    if i == 0 and player.coins >= 50 * (save_data.upgrades["damage"] + 1) and save_data.upgrades["damage"] < 5:
-                        player.coins -= 50 * (save_data.upgrades["damage"] + 1)
-                        save_data.upgrades["damage"] += 1
-                        player.damage = 1 + save_data.upgrades["damage"] * 0.5
-                        save_data.save()
-                    elif i == 1 and player.coins >= 40 * (save_data.upgrades["speed"] + 1) and save_data.upgrades["speed"] < 5:
-                        player.coins -= 40 * (save_data.upgrades["speed"] + 1)
-                        save_data.upgrades["speed"] += 1
-                        player.speed = BASE_SPEED + save_data.upgrades["speed"] * 0.5
-                        save_data.save()
-                    elif i == 2 and player.coins >= 60 * (save_data.upgrades["fire_rate"] + 1) and save_data.upgrades["fire_rate"] < 5:
-                        player.coins -= 60 * (save_data.upgrades["fire_rate"] + 1)
-                        save_data.upgrades["fire_rate"] += 1
-                        player.fire_rate = PLAYER_FIRE_RATE - save_data.upgrades["fire_rate"] * 2
-                        save_data.save()
-                    elif i == 3 and player.coins >= 80 * (save_data.upgrades["health"] + 1) and save_data.upgrades["health"] < 5:
-                        player.coins -= 80 * (save_data.upgrades["health"] + 1)
-                        save_data.upgrades["health"] += 1
-                        player.max_health = 3 + save_data.upgrades["health"]
+                    if i == 0 and player.coins >= 50 * (upgrades["damage"] + 1) and upgrades["damage"] < 5:
+                        player.coins -= 50 * (upgrades["damage"] + 1)
+                        upgrades["damage"] += 1
+                        player.damage = 1 + upgrades["damage"] * 0.5
+                        self.save.save()
+                    elif i == 1 and player.coins >= 40 * (upgrades["speed"] + 1) and upgrades["speed"] < 5:
+                        player.coins -= 40 * (upgrades["speed"] + 1)
+                        upgrades["speed"] += 1
+                        player.speed = BASE_SPEED + upgrades["speed"] * 0.5
+                        self.save.save()
+                    elif i == 2 and player.coins >= 60 * (upgrades["fire_rate"] + 1) and upgrades["fire_rate"] < 5:
+                        player.coins -= 60 * (upgrades["fire_rate"] + 1)
+                        upgrades["fire_rate"] += 1
+                        player.fire_rate = PLAYER_FIRE_RATE - upgrades["fire_rate"] * 2
+                        self.save.save()
+                    elif i == 3 and player.coins >= 80 * (upgrades["health"] + 1) and upgrades["health"] < 5:
+                        player.coins -= 80 * (upgrades["health"] + 1)
+                        upgrades["health"] += 1
+                        player.max_health = 3 + upgrades["health"]
                         player.health = player.max_health
-                        save_data.save()
-                    elif i == 4 and player.coins >= 70 * (save_data.upgrades["shield"] + 1) and save_data.upgrades["shield"] < 5:
-                        player.coins -= 70 * (save_data.upgrades["shield"] + 1)
-                        save_data.upgrades["shield"] += 1
-                        save_data.save()
+                        self.save.save()
+                    elif i == 4 and player.coins >= 70 * (upgrades["shield"] + 1) and upgrades["shield"] < 5:
+                        player.coins -= 70 * (upgrades["shield"] + 1)
+                        upgrades["shield"] += 1
+                        self.save.save()
                     elif i == 5:
-                        current_state = GameState.MENU
-                        
-        # Draw shop
-        title = FONT_TITLE.render("UPGRADE HANGAR", True, CYBER_BLUE)
-        game_surface.blit(title, (WIDTH//2 - title.get_width()//2, 40))
-        
-        coins_text = FONT_LARGE.render(f"COINS: {player.coins}", True, CYBER_YELLOW)
-        game_surface.blit(coins_text, (WIDTH//2 - coins_text.get_width()//2, 100))
-        
-        for button in upgrade_buttons:
-            button.draw(game_surface)
-            
+                        self.state = GameState.MENU
+
+    def next_inputs(self):
+        # Input bits for one step: the replay being played, else the keyboard.
+        # None once the replay has run out.
+        if self.replay is not None:
+            if self.replay_step >= len(self.replay.inputs):
+                return None
+            self.replay_step += 1
+            return self.replay.inputs[self.replay_step - 1]
+        inputs = read_inputs(pygame.key.get_pressed())
+        if self.recording is not None:
+            self.recording.record(inputs)
+        return inputs
+
+    def tick(self):
+        # One fixed simulation step; menus are updated per frame in update()
+        world = self.world
+        if self.state == GameState.PLAYING:
+            inputs = self.next_inputs()
+            if inputs is None:
+                self.end_mission()
+            else:
+                world.step(inputs)
+                if world.game_over:
+                    self.end_mission()
+        if world.screen_shake > 0:
+            world.screen_shake -= 1
+
+        # Background speed based on game state
+        bg_speed = 1.0
+        if self.state == GameState.PLAYING:
+            bg_speed = 1.5 + world.level * 0.1
+        self.renderer.background.update(bg_speed)
+
+    def draw(self, mouse_pos, alpha=1.0):
+        world = self.world
+        screen = self.screen
+        targets = self.renderer.targets
+        playing = self.state == GameState.PLAYING
+
+        # The world may render at reduced detail; menus and the HUD never do
+        self.renderer.set_tier(self.quality.tier if playing else QUALITY_TIERS[0])
+        view.scale = self.quality.scale if playing else 1.0
+        layer = screen
+        if view.scale != 1:
+            layer = targets.acquire(view.size((WIDTH, HEIGHT)), tag="world")
+
+        self.renderer.draw_background(layer)
+
+        # Apply screen shake
+        shake_offset = (0, 0)
+        if world.screen_shake > 0:
+            shake_offset = (random.uniform(-world.shake_intensity, world.shake_intensity) * view.scale,
+                           random.uniform(-world.shake_intensity, world.shake_intensity) * view.scale)
+
+        # Shaken frames are drawn into a pooled offscreen target
+        game_surface = layer
+        if world.screen_shake > 0:
+            game_surface = targets.acquire(layer.get_size(), tag="shake")
+            game_surface.fill(DARK_BG)
+
+        if self.state == GameState.MENU:
+            self.draw_menu(game_surface)
+        elif playing:
+            self.renderer.draw_world(game_surface, world, alpha)
+        elif self.state == GameState.UPGRADES:
+            self.draw_shop(game_surface)
+        elif self.state == GameState.GAME_OVER:
+            self.draw_game_over(game_surface)
+
+        # Apply screen shake if needed
+        if game_surface is not layer:
+            targets.composite(layer, game_surface, shake_offset)
+
+        # Upscale the world layer to the display
+        if layer is not screen:
+            pygame.transform.scale(layer, screen.get_size(), screen)
+        profiler.lap("compose")
+
+        if playing:
+            self.renderer.draw_hud(screen, world)
+            profiler.lap("hud")
+        profiler.draw(screen)
+
+        # Draw mouse cursor
+        pygame.draw.circle(screen, CYBER_BLUE, mouse_pos, 8, 2)
+        pygame.draw.circle(screen, NEON_WHITE, mouse_pos, 4)
+
+    def present(self):
+        # The animated background repaints the whole screen in every state
+        pygame.display.flip()
+
+    def draw_menu(self, surface):
+        title_text = text_cache.render(FONT_TITLE, "NEO DODGE", CYBER_BLUE)
+        surface.blit(title_text, (WIDTH//2 - title_text.get_width()//2, 80))
+
+        subtitle = text_cache.render(FONT, "CYBER ARENA", CYBER_PINK)
+        surface.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 160))
+
+        high_score_text = text_cache.render(FONT, f"HIGH SCORE: {self.save.high_score}", CYBER_YELLOW)
+        surface.blit(high_score_text, (WIDTH//2 - high_score_text.get_width()//2, 220))
+
+        self.play_button.draw(surface)
+        self.shop_button.draw(surface)
+        self.quit_button.draw(surface)
+
+        # Draw animated ships in background
+        for i in range(3):
+            x = 100 + i * 250
+            y = 400 + math.sin(self.game_time + i) * 20
+            pygame.draw.polygon(surface, CYBER_BLUE,
+                              [(x, y), (x+40, y-20), (x+40, y+20)])
+
+    def draw_shop(self, surface):
+        player = self.world.player
+
+        title = text_cache.render(FONT_TITLE, "UPGRADE HANGAR", CYBER_BLUE)
+        surface.blit(title, (WIDTH//2 - title.get_width()//2, 40))
+
+        coins_text = text_cache.render(FONT_LARGE, f"COINS: {player.coins}", CYBER_YELLOW)
+        surface.blit(coins_text, (WIDTH//2 - coins_text.get_width()//2, 100))
+
+        for button in self.shop_buttons():
+            button.draw(surface)
+
         # Draw player preview
         preview_rect = pygame.Rect(550, 250, 100, 100)
-        pygame.draw.rect(game_surface, CYBER_BLUE, preview_rect, 0, 10)
-        pygame.draw.rect(game_surface, NEON_WHITE, preview_rect, 2, 10)
-        
-        ship_preview = FONT.render("SHIP", True, NEON_WHITE)
-        game_surface.blit(ship_preview, (preview_rect.centerx - ship_preview.get_width()//2,
-                                       preview_rect.centery - ship_preview.get_height()//2))
-        
+        pygame.draw.rect(surface, CYBER_BLUE, preview_rect, 0, 10)
+        pygame.draw.rect(surface, NEON_WHITE, preview_rect, 2, 10)
+
+        ship_preview = text_cache.render(FONT, "SHIP", NEON_WHITE)
+        surface.blit(ship_preview, (preview_rect.centerx - ship_preview.get_width()//2,
+                                   preview_rect.centery - ship_preview.get_height()//2))
+
         stats_y = 370
         stats = [
             f"DAMAGE: {player.damage:.1f}",
             f"SPEED: {player.speed:.1f}",
             f"FIRE RATE: {60/(player.fire_rate/60):.1f}/sec",
             f"HEALTH: {player.health}/{player.max_health}",
-            f"SHIELD TIME: {save_data.upgrades['shield'] * 2}s"
+            f"SHIELD TIME: {self.save.upgrades['shield'] * 2}s"
         ]
-        
+
         for i, stat in enumerate(stats):
-            draw_text(game_surface, stat, FONT_SMALL, NEON_WHITE, 550, stats_y + i * 25)
-            
-    elif current_state == GameState.GAME_OVER:
-        # Update buttons
-        resume_button.text = f"RESTART (SCORE: {score})"
-        resume_button.update(mouse_pos)
-        menu_button.update(mouse_pos)
-        
-        if resume_button.is_clicked(mouse_pos, mouse_click):
-            current_state = GameState.PLAYING
-            score = 0
-            level = 1
-            player.health = player.max_health
-            enemies.clear()
-            player.bullets.clear()
-            particles.clear()
-            effects.clear()
-            powerups.clear()
-            # Reset player position
-            player.rect.x = 80
-            player.rect.y = HEIGHT//2
-        elif menu_button.is_clicked(mouse_pos, mouse_click):
-            current_state = GameState.MENU
-            
-        # Draw game over screen
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))
-        game_surface.blit(overlay, (0, 0))
-        
-        game_over_text = FONT_TITLE.render("MISSION FAILED", True, CYBER_RED)
-        game_surface.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, 80))
-        
-        score_text = FONT_LARGE.render(f"FINAL SCORE: {score}", True, CYBER_YELLOW)
-        game_surface.blit(score_text, (WIDTH//2 - score_text.get_width()//2, 180))
-        
-        high_text = FONT.render(f"HIGH SCORE: {save_data.high_score}", True, CYBER_GREEN)
-        game_surface.blit(high_text, (WIDTH//2 - high_text.get_width()//2, 240))
-        
-        level_text = FONT.render(f"LEVEL REACHED: {level}", True, CYBER_BLUE)
-        game_surface.blit(level_text, (WIDTH//2 - level_text.get_width()//2, 280))
-        
-        coins_text = FONT.render(f"COINS EARNED: {player.coins}", True, CYBER_PINK)
-        game_surface.blit(coins_text, (WIDTH//2 - coins_text.get_width()//2, 320))
-        
-        resume_button.draw(game_surface)
-        menu_button.draw(game_surface)
-        
+            draw_text(surface, stat, FONT_SMALL, NEON_WHITE, 550, stats_y + i * 25)
+
+    def draw_game_over(self, surface):
+        world = self.world
+
+        overlay = self.renderer.targets.overlay(surface.get_size(), (0, 0, 0, 200))
+        surface.blit(overlay, (0, 0))
+
+        game_over_text = text_cache.render(FONT_TITLE, "MISSION FAILED", CYBER_RED)
+        surface.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, 80))
+
+        score_text = text_cache.render(FONT_LARGE, f"FINAL SCORE: {world.score}", CYBER_YELLOW)
+        surface.blit(score_text, (WIDTH//2 - score_text.get_width()//2, 180))
+
+        high_text = text_cache.render(FONT, f"HIGH SCORE: {self.save.high_score}", CYBER_GREEN)
+        surface.blit(high_text, (WIDTH//2 - high_text.get_width()//2, 240))
+
+        level_text = text_cache.render(FONT, f"LEVEL REACHED: {world.level}", CYBER_BLUE)
+        surface.blit(level_text, (WIDTH//2 - level_text.get_width()//2, 280))
+
+        coins_text = text_cache.render(FONT, f"COINS EARNED: {world.player.coins}", CYBER_PINK)
+        surface.blit(coins_text, (WIDTH//2 - coins_text.get_width()//2, 320))
+
+        self.resume_button.draw(surface)
+        self.menu_button.draw(surface)
+
         # Draw tips
         tips = [
             "TIP: Keep moving to avoid enemy fire",
@@ -1250,26 +3103,110 @@ while running:
             "TIP: Higher combos give more points",
             "TIP: Use coins to upgrade your ship"
         ]
-        
+
         for i, tip in enumerate(tips):
-            tip_text = FONT_SMALL.render(tip, True, CYBER_BLUE)
-            game_surface.blit(tip_text, (WIDTH//2 - tip_text.get_width()//2, 400 + i * 25))
-    
-    # Apply screen shake if needed
-    if screen_shake > 0:
-        SCREEN.blit(game_surface, (int(shake_offset[0]), int(shake_offset[1])))
-    else:
-        SCREEN.blit(game_surface, (0, 0))
-    
-    # Draw mouse cursor
-    pygame.draw.circle(SCREEN, CYBER_BLUE, mouse_pos, 8, 2)
-    pygame.draw.circle(SCREEN, NEON_WHITE, mouse_pos, 4)
-    
-    # Update display
-    pygame.display.flip()
-
-# Clean up
-save_data.save()
-pygame.quit()
-sys.exit()
+            tip_text = text_cache.render(FONT_SMALL, tip, CYBER_BLUE)
+            surface.blit(tip_text, (WIDTH//2 - tip_text.get_width()//2, 400 + i * 25))
+
+    def run(self):
+        while self.running:
+            profiler.frame()
+            delta_time = self.clock.tick(FPS) / 1000.0
+            self.game_time += delta_time
+            if self.state == GameState.PLAYING:
+                self.quality.update(self.clock.get_rawtime())
+            profiler.lap("idle")
+
+            mouse_pos = pygame.mouse.get_pos()
+            mouse_click = self.handle_events()
+            profiler.lap("events")
+            self.update(mouse_pos, mouse_click)
+            profiler.lap("ui")
+
+            steps = self.timestep.advance(delta_time)
+            for _ in range(steps):
+                self.tick()
+            profiler.sample(self.world, self.quality)
+
+            if self.timestep.should_render(steps):
+                self.draw(mouse_pos, self.timestep.alpha)
+
+                # Update display
+                self.present()
+                profiler.lap("flip")
+                if not startup.done:
+                    startup.finish("first frame")
+
+# ================= MAIN =================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NEO DODGE - Cyber Arena")
+    parser.add_argument("--headless", type=int, metavar="FRAMES",
+                        help="simulate FRAMES frames without a display and exit")
+    parser.add_argument("--profile", nargs="?", const="profile.csv", metavar="PATH",
+                        help="time every frame, show the F3 overlay and write the "
+                             "trace to PATH (.csv or .json) on exit")
+    parser.add_argument("--seed", type=int, help="seed every mission's random streams")
+    parser.add_argument("--record", metavar="PATH", help="record the mission's inputs to a replay file")
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded mission")
+    parser.add_argument("--quality", choices=[tier.name for tier in QUALITY_TIERS],
+                        help="draw at this quality tier instead of adapting it to frame time")
+    parser.add_argument("--render-scale", type=float, metavar="SCALE",
+                        help="draw the world at SCALE (0-1] of native resolution "
+                             "whatever the quality tier")
+    parser.add_argument("--startup", action="store_true",
+                        help="print how long each startup stage took once the first frame is up")
+    args = parser.parse_args(argv)
+    if args.render_scale is not None and not 0 < args.render_scale <= 1:
+        parser.error("--render-scale must be in (0, 1]")
+    # Replays pack the seed unsigned and numpy rejects negative seeds
+    if args.seed is not None and not 0 <= args.seed < 2 ** 63:
+        parser.error("--seed must be in [0, 2**63)")
+    startup.stage("import")
+    startup.verbose = args.startup
+    replay = Replay.load(args.replay) if args.replay else None
+
+    if args.profile:
+        profiler.enable(record=True)
+
+    if args.headless is not None:
+        run_headless(args.headless, args.seed, args.record, replay)
+        if args.profile:
+            profiler.frame()
+            profiler.dump(args.profile)
+        return
+
+    # Only what the menu needs; the mixer starts with the first mission
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("NEO DODGE - Cyber Arena")
+    startup.stage("display")
+    load_fonts()
+    startup.stage("fonts")
+    archetypes.require()
+    startup.stage("enemies")
+
+    # Playback must not touch the player's real progress
+    save = SaveData(None) if replay else save_data
+    save.load()
+    startup.stage("save")
+
+    game = Game(screen, save, args.seed, args.record, replay)
+    if args.quality or args.render_scale is not None:
+        tier = [tier.name for tier in QUALITY_TIERS].index(args.quality) if args.quality else None
+        game.quality = QualityGovernor(tier, args.render_scale)
+    startup.stage("game")
+    game.run()
+
+    # Clean up
+    game.stop_recording()
+    save.save()
+    save.close()
+    if args.profile:
+        profiler.frame()
+        profiler.dump(args.profile)
+    pygame.quit()
 
+if __name__ == "__main__":
+    main()
+    sys.exit()